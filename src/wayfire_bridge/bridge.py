@@ -5,92 +5,81 @@ Includes: environment file, peripherals, mutter settings, panel settings
 
 import os
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 import gi
 
 gi.require_version('Gio', '2.0')
 gi.require_version('GLib', '2.0')
 from gi.repository import Gio, GLib
 
-try:
-    import dbus
-    import dbus.mainloop.glib
-    DBUS_AVAILABLE = True
-except ImportError:
-    DBUS_AVAILABLE = False
-
-from .config_manager import ConfigManager
+from .config_manager import ConfigManager, atomic_write_text, parse_key_value_text
+from .ipc import WayfireIPCClient
+from .write_scheduler import WriteScheduler
 from .keybindings import CustomKeybindingsHandler
 from .media_keys import MediaKeysHandler
-from .mappings import GSETTINGS_MAPPINGS
-from .transforms import (
-    TransformFunctions,
-    parse_options_string,
-    normalize_xkb_options,
-    format_keyboard_layout,
-)
+from .mappings import CompiledMapping, compile_mappings, merge_groups
+from .key_throttle import KeyThrottle
+from .dependency_graph import DependencyGraph
+from .transforms import TransformFunctions
 from .budgie_wm_actions import BudgieWMActionsHandler
+from .startup_timer import StartupTimer
+from .dconf_snapshot import SettingsSnapshot, arm_change_notifications
+from .startup_cache import StartupCache, startup_fingerprint
+from .locale1 import Locale1Properties
+from .keyboard import KEYBOARD_FILE, KeyboardResolver
+from .session_environment import SessionEnvironment
 from .logging_config import get_logger
 
 log = get_logger(__name__)
 
-
-def read_key_value_file(filepath, strip_quotes=False):
-    """Read a key=value config file into a dict."""
-    config = {}
-    if not os.path.exists(filepath):
-        return config
-
-    try:
-        with open(filepath, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    if strip_quotes:
-                        value = value.strip('"').strip("'")
-                    config[key] = value
-    except Exception:
-        log.debug("Could not read %s", filepath, exc_info=True)
-
-    return config
-
-
-def get_locale1_all_properties(dbus_bus):
-    """Get all properties from org.freedesktop.locale1"""
-    if not dbus_bus:
-        return None
-
-    try:
-        proxy = dbus_bus.get_object(
-            'org.freedesktop.locale1',
-            '/org/freedesktop/locale1'
-        )
-        props_iface = dbus.Interface(
-            proxy,
-            'org.freedesktop.DBus.Properties'
-        )
-        return props_iface.GetAll('org.freedesktop.locale1')
-    except Exception:
-        log.debug("Could not read locale1 properties", exc_info=True)
-        return None
+# How long startup waits for the locale1 proxy once GSettings is set up
+LOCALE1_STARTUP_TIMEOUT_MS = 2000
 
 
 class WayfireBridge:
     """Main bridge coordinator with full feature parity to labwc bridge"""
 
-    def __init__(self):
-        # Initialize dbus mainloop FIRST if available
-        if DBUS_AVAILABLE:
-            dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
+    def __init__(self, sync_once: bool = False):
+        """With sync_once, only bring wayfire.ini and the environment file
+        up to date: no compositor connection and nothing that needs the
+        main loop, so it can run before Wayfire is started."""
+        self.sync_once = sync_once
 
-        self.config_manager = ConfigManager()
+        # One compositor connection shared by everything that talks IPC
+        self.ipc = None if sync_once else WayfireIPCClient()
+        self.config_manager = ConfigManager(ipc_client=self.ipc)
         self.transforms = TransformFunctions()
+        # {schema: {key: CompiledMapping}} with transforms resolved
+        self.gsettings_dispatch = compile_mappings(self.transforms)
+        # (section, option) -> every keybinding mapping that targets it
+        self.binding_merges = merge_groups(self.gsettings_dispatch)
+        # Slider-driven keys: live preview at a bounded rate, one write per drag
+        self.throttle = KeyThrottle(GLib.timeout_add, GLib.source_remove)
+        # Options computed from several inputs, recomputed per changed input
+        self.derived = DependencyGraph.compile(self.config_manager, self)
         self.settings_objects: Dict[str, Gio.Settings] = {}
-        self.dbus_system_bus = None
+        # Startup values, read in bulk; only set while startup applies them
+        self.snapshot: Optional[SettingsSnapshot] = None
+        self.startup_cache = StartupCache(self.config_manager.config_path.parent)
+        self.locale1 = Locale1Properties(self.on_locale1_properties_changed,
+                                         watch=not sync_once)
+        # Apps launched later see environment file changes without a relogin;
+        # before Wayfire starts, the session script exports the file itself
+        self.session_env = None if sync_once else SessionEnvironment()
+        # Layout, variant and options, resolved once per input change
+        self.keyboard = KeyboardResolver(
+            self._reader, self.locale1, self.on_keyboard_file_changed
+        )
 
-        # Delay config writes when doing bulk updates
-        self.delay_config_write = False
+        # Coalesce saves from every handler into one write per quiet window
+        if not sync_once:
+            self.config_manager.scheduler = WriteScheduler.from_environment(
+                self.config_manager.flush
+            )
+        # Opt-in: apply changes over IPC first, persist the file when idle
+        self.config_manager.live_apply = os.environ.get(
+            'WAYFIRE_BRIDGE_LIVE_APPLY', '0'
+        ).strip() not in ('', '0', 'false', 'no')
 
         # Initialise handlers
         self.keybindings_handler = CustomKeybindingsHandler(
@@ -106,96 +95,235 @@ class WayfireBridge:
             self.transforms
         )
 
-        # Setup locale1 monitoring
-        if DBUS_AVAILABLE:
+        self.startup()
+
+    def startup(self):
+        """Bring wayfire.ini up to date in a single pass, then start watching.
+
+        snapshot  open every settings source once and connect its watchers
+        compute   apply each input exactly once, inside one transaction
+        commit    one wayfire.ini write and the environment file
+        live      reconcile the running compositor and follow restarts
+                  (skipped in sync_once mode)
+        """
+        timer = StartupTimer()
+
+        with timer.phase('snapshot'):
             self.setup_locale1_monitor()
+            # Before any watcher is connected: waiting dispatches whatever
+            # else is ready, and no change handler may run outside the
+            # startup transaction
+            self.locale1.wait(LOCALE1_STARTUP_TIMEOUT_MS)
+            if not self.sync_once:
+                self.keyboard.watch()
+            self.setup_gsettings()
+            self.setup_derived_monitoring()
+            self.setup_peripheral_monitoring()
+            self.setup_mutter_settings()
+            self.setup_panel_settings()
+            self.setup_default_terminal()
+            # Watchers first, so nothing changed after the snapshot is missed
+            self.snapshot = SettingsSnapshot.load()
+            inputs = self._startup_fingerprint()
+            # Same inputs as the last completed sync, and its output untouched
+            up_to_date = (
+                inputs is not None
+                and not self.config_manager.has_pending_changes()
+                and self.startup_cache.is_fresh(inputs, self._startup_outputs())
+            )
 
-        # Setup all gsettings monitoring
-        self.setup_gsettings()
-        self.keybindings_handler.setup()
-        self.media_keys_handler.setup()
-        self.budgie_wm_handler.setup()
+        try:
+            with timer.phase('compute'):
+                with self.config_manager.transaction():
+                    # Handlers always set up their watchers, even when the
+                    # values they would apply are known to be in place
+                    apply = not up_to_date
+                    watch = not self.sync_once
+                    self.keybindings_handler.setup(self.snapshot, apply=apply, watch=watch)
+                    self.media_keys_handler.setup(self.snapshot, apply=apply, watch=watch)
+                    self.budgie_wm_handler.setup(self.snapshot, apply=apply, watch=watch)
+                    if up_to_date:
+                        log.info("Settings unchanged since the last sync, skipping startup sync")
+                        # What reconcile() and replay() check the compositor against
+                        self.config_manager.restore_managed(self.startup_cache.managed_options())
+                    else:
+                        self.bridge_config()
+
+            with timer.phase('commit'):
+                if not up_to_date:
+                    # Commit the startup state now rather than after the quiet window
+                    self.config_manager.flush()
+                    self.write_environment_file()
+                    log.info(
+                        "Initial bridge config sync complete (%d writes, %d unchanged skipped)",
+                        self.config_manager.writes_performed,
+                        self.config_manager.writes_skipped,
+                    )
+                    if inputs is not None and not self.config_manager.has_pending_changes():
+                        self.startup_cache.store(
+                            inputs, self._startup_outputs(),
+                            self.config_manager.managed_options(),
+                        )
+        finally:
+            # From here on every read must see the live value
+            self.snapshot = None
 
-        # Setup peripheral monitoring with special handlers
-        self.setup_peripheral_monitoring()
+        if self.sync_once:
+            timer.report()
+            return
 
-        # Setup mutter and panel settings
-        self.setup_mutter_settings()
-        self.setup_panel_settings()
+        with timer.phase('live'):
+            # Wayfire may hold values that differ from the file (a previous
+            # bridge pushed them live, or it is still starting up); read them
+            # back and push only what actually differs
+            self.config_manager.reconcile()
 
-        # Setup default terminal monitoring
-        self.setup_default_terminal()
+            # The compositor can restart underneath us (crash, nested session);
+            # bring each new instance up to date as soon as its socket appears
+            self.ipc.watch_compositor(self.config_manager.replay)
 
-        # Write initial environment file
-        self.write_environment_file()
+        timer.report()
 
-        # Perform initial bridge config sync
-        self.bridge_config()
+    def _startup_outputs(self) -> Dict[str, Path]:
+        """Files the startup sync produces."""
+        config_dir = self.config_manager.config_path.parent
+        return {
+            'wayfire.ini': self.config_manager.config_path,
+            'environment': config_dir / 'environment',
+        }
+
+    def _startup_fingerprint(self) -> Optional[str]:
+        """Fingerprint of every input the startup sync reads, if one can be taken.
+
+        Needs the dconf snapshot: GSettings read through Gio can't be
+        fingerprinted without reading every key, which is the sync itself.
+        """
+        if self.snapshot is None or self.snapshot.fingerprint is None:
+            return None
 
-    def setup_locale1_monitor(self):
-        """Setup monitoring of org.freedesktop.locale1 using dbus-python"""
         try:
-            bus = dbus.SystemBus()
-            self.dbus_system_bus = bus
-
-            bus.add_signal_receiver(
-                self.on_locale1_properties_changed,
-                signal_name='PropertiesChanged',
-                dbus_interface='org.freedesktop.DBus.Properties',
-                path='/org/freedesktop/locale1',
-                arg0='org.freedesktop.locale1'
-            )
-            log.info("locale1 monitoring enabled")
-        except Exception:
-            log.warning("Could not setup locale1 monitoring", exc_info=True)
+            keyboard_mtime = os.stat(KEYBOARD_FILE).st_mtime_ns
+        except OSError:
+            keyboard_mtime = None
 
-    def on_locale1_properties_changed(self, interface, changed, invalidated):
-        """Handler for PropertiesChanged signals from locale1"""
-        log.debug("locale1 PropertiesChanged received for interface: %s", interface)
+        return startup_fingerprint(
+            self.snapshot.fingerprint, self.locale1.get_all(), keyboard_mtime, os.environ
+        )
+
+    def _reader(self, schema: str):
+        """Object to read schema's values from, or None if it isn't available.
+
+        During startup this is the bulk snapshot; afterwards, and for
+        anything the snapshot can't provide, the live Gio.Settings. Both
+        offer the same get_value()/get_string()/... getters.
+        """
+        settings = self.settings_objects.get(schema)
+        if settings is not None and self.snapshot is not None:
+            return self.snapshot.view(schema) or settings
+        return settings
+
+    def _get_settings(self, schema: str) -> Optional[Gio.Settings]:
+        """Return the shared Gio.Settings for schema, creating it on first use.
+
+        Every watcher on a schema connects to this one object; replacing it
+        with a second object would silently drop the first one's handlers.
+        """
+        settings = self.settings_objects.get(schema)
+        if settings is None:
+            source = Gio.SettingsSchemaSource.get_default()
+            if source is None or not source.lookup(schema, True):
+                return None
+            settings = Gio.Settings.new(schema)
+            self.settings_objects[schema] = settings
+        return settings
+
+    def _watch(self, settings: Gio.Settings, keys, handler, *args):
+        """Connect handler(settings, key, *args) to changed::<key> for each key.
+
+        A no-op in sync_once mode: the process exits before any change.
+        """
+        if self.sync_once:
+            return
+        for key in keys:
+            settings.connect(f'changed::{key}', handler, *args)
+        arm_change_notifications(settings, keys)
+
+    def setup_locale1_monitor(self):
+        """Start monitoring org.freedesktop.locale1 (asynchronous GDBus proxy)"""
+        self.locale1.start()
+
+    def on_locale1_properties_changed(self, changed, invalidated):
+        """Handler for locale1 property changes"""
+        log.debug("locale1 properties changed")
         if changed:
-            log.debug("Changed properties: %s", dict(changed))
+            log.debug("Changed properties: %s", changed)
         if invalidated:
-            log.debug("Invalidated properties: %s", list(invalidated))
+            log.debug("Invalidated properties: %s", invalidated)
+
+        # Keyboard layout and options may fall back to locale1
+        self.keyboard.invalidate()
+        self.apply_keyboard_change(('locale1',))
+
+    def on_keyboard_file_changed(self):
+        """Handler for changes to /etc/default/keyboard"""
+        self.apply_keyboard_change(('file', KEYBOARD_FILE))
+
+    def apply_keyboard_change(self, *inputs):
+        """Recompute the keyboard options after inputs changed.
 
-        # Update environment file
+        Wayfire rebuilds its keymap when [input] xkb_* change, so the new
+        values are pushed over IPC at once rather than after the write
+        window. The environment file only serves XWayland and next login.
+        """
+        changed = self.derived.invalidate(*inputs)
+        if changed:
+            log.info("Keyboard changed, applying live: %s",
+                     ', '.join(f"{option}={self.config_manager.get_value(section, option)}"
+                               for section, option in sorted(changed)))
+            self.config_manager.push_live(changed)
         self.write_environment_file()
 
-        # Reload wayfire config if not delayed
-        if not self.delay_config_write:
-            self.config_manager.reload_wayfire()
+    def setup_derived_monitoring(self):
+        """Watch every GSettings input of the derived options.
+
+        Values are computed later, once, by bridge_config().
+        """
+        for input_id in self.derived.inputs():
+            # Already dropped along with an unavailable sibling input
+            if input_id[0] != 'gsettings' or not self.derived.dependents(input_id):
+                continue
+            _, schema, key = input_id
+            try:
+                settings = self._get_settings(schema)
+                if not settings:
+                    # Computes read None for a missing schema and fall back
+                    continue
+                if not settings.props.settings_schema.has_key(key):
+                    dropped = self.derived.remove_dependents(input_id)
+                    log.warning("Key %s not in schema %s, skipping %s",
+                                key, schema, ', '.join(dropped))
+                    continue
+                self._watch(settings, [key], self._on_derived_input_changed, input_id)
+            except Exception:
+                log.exception("Error setting up %s::%s", schema, key)
+
+    def _on_derived_input_changed(self, settings, key: str, input_id):
+        """Recompute the derived options that read the changed key"""
+        log.debug("Derived input changed: %s::%s", input_id[1], key)
+        affected = self.derived.dependents(input_id)
+        if 'xkb_layout' in affected or 'xkb_options' in affected:
+            self.keyboard.invalidate()
+            self.apply_keyboard_change(input_id)
+        else:
+            self.derived.invalidate(input_id)
 
     def setup_peripheral_monitoring(self):
         """Setup special monitoring for peripheral settings that need custom handling"""
-        # Touchpad scroll method requires monitoring two keys
-        try:
-            source = Gio.SettingsSchemaSource.get_default()
-            if source.lookup('org.gnome.desktop.peripherals.touchpad', True):
-                touchpad_settings = Gio.Settings.new('org.gnome.desktop.peripherals.touchpad')
-                touchpad_settings.connect(
-                    'changed::two-finger-scrolling-enabled',
-                    self._on_scroll_method_changed
-                )
-                touchpad_settings.connect(
-                    'changed::edge-scrolling-enabled',
-                    self._on_scroll_method_changed
-                )
-                touchpad_settings.connect(
-                    'changed::left-handed',
-                    self._on_touchpad_left_handed_changed
-                )
-                self.settings_objects['org.gnome.desktop.peripherals.touchpad'] = touchpad_settings
-                log.debug("Touchpad monitoring enabled")
-        except Exception:
-            log.warning("Could not setup touchpad monitoring", exc_info=True)
-
         # Mouse settings
         try:
-            source = Gio.SettingsSchemaSource.get_default()
-            if source.lookup('org.gnome.desktop.peripherals.mouse', True):
-                mouse_settings = Gio.Settings.new('org.gnome.desktop.peripherals.mouse')
-                mouse_settings.connect('changed::left-handed', self._on_mouse_left_handed_changed)
-                mouse_settings.connect('changed::double-click', self._on_double_click_unsupported)
-                self.settings_objects['org.gnome.desktop.peripherals.mouse'] = mouse_settings
+            mouse_settings = self._get_settings('org.gnome.desktop.peripherals.mouse')
+            if mouse_settings:
+                self._watch(mouse_settings, ['double-click'], self._on_double_click_unsupported)
                 log.debug("Mouse monitoring enabled")
         except Exception:
             log.warning("Could not setup mouse monitoring", exc_info=True)
@@ -213,16 +341,14 @@ class WayfireBridge:
     def setup_mutter_settings(self):
         """Setup monitoring for mutter settings"""
         try:
-            source = Gio.SettingsSchemaSource.get_default()
-            if source.lookup('org.gnome.mutter', True):
-                mutter_settings = Gio.Settings.new('org.gnome.mutter')
-                mutter_settings.connect('changed::center-new-windows', self._on_mutter_changed)
-                mutter_settings.connect('changed::overlay-key', self._on_mutter_changed)
-                self.settings_objects['org.gnome.mutter'] = mutter_settings
+            mutter_settings = self._get_settings('org.gnome.mutter')
+            if mutter_settings:
+                self._watch(mutter_settings, ['center-new-windows', 'overlay-key'],
+                            self._on_mutter_changed)
 
             # mutter.keybindings is handled via GSETTINGS_MAPPINGS in setup_gsettings()
             # but we need to confirm the schema exists and log appropriately
-            if source.lookup('org.gnome.mutter.keybindings', True):
+            if 'org.gnome.mutter.keybindings' in self.settings_objects:
                 log.info("org.gnome.mutter.keybindings schema found — tiling keybindings active")
             else:
                 log.warning("org.gnome.mutter.keybindings schema not found — tiling keybindings unavailable")
@@ -235,55 +361,17 @@ class WayfireBridge:
     def _setup_budgie_wm_focus_monitor(self):
         """Monitor com.solus-project.budgie-wm settings that need special handling."""
         try:
-            source = Gio.SettingsSchemaSource.get_default()
-            if not source.lookup('com.solus-project.budgie-wm', True):
+            budgie_wm = self._get_settings('com.solus-project.budgie-wm')
+            if not budgie_wm:
                 log.warning("com.solus-project.budgie-wm schema not found")
                 return
 
-            budgie_wm = Gio.Settings.new('com.solus-project.budgie-wm')
-            self.settings_objects['com.solus-project.budgie-wm'] = budgie_wm
-
-            budgie_wm.connect(
-                'changed::window-focus-mode',
-                lambda s, k: self._on_budgie_wm_focus_changed(s)
-            )
-            budgie_wm.connect(
-                'changed::edge-tiling',
-                lambda s, k: self._on_edge_tiling_changed(s)
-            )
-            log.info("budgie-wm monitoring enabled (focus-mode, edge-tiling)")
+            self._watch(budgie_wm, ['window-focus-mode'],
+                        lambda s, k: self._on_budgie_wm_focus_changed(s))
+            log.info("budgie-wm monitoring enabled (focus-mode)")
         except Exception:
             log.warning("Could not setup budgie-wm monitor", exc_info=True)
 
-    def _on_edge_tiling_changed(self, settings):
-        """Handle edge-tiling from com.solus-project.budgie-wm.
-
-        labwc maps this to <snapping><range> of 10 or 0.
-
-        In Wayfire, aero-snap is controlled by TWO settings:
-        [move] enable_snap   — master switch for edge snapping during drag
-        [grid] mouse_snap    — whether dragging to edge triggers a grid slot
-
-        Both must be toggled together to match labwc behaviour.
-        The grid plugin must also be loaded for either to work.
-        """
-        enabled = settings.get_boolean('edge-tiling')
-        value = 'true' if enabled else 'false'
-
-        self.config_manager.set_value('move', 'enable_snap', value)
-        self.config_manager.set_value('grid', 'mouse_snap', value)
-
-        if enabled:
-            self._ensure_plugin('grid')
-            self._ensure_plugin('move')
-            log.info("Edge tiling enabled (move.enable_snap + grid.mouse_snap = true)")
-        else:
-            log.info("Edge tiling disabled (move.enable_snap + grid.mouse_snap = false)")
-
-        if not self.delay_config_write:
-            self.config_manager.save()
-            self.config_manager.reload_wayfire()
-
     def _on_budgie_wm_focus_changed(self, settings):
         """Handle window-focus-mode from com.solus-project.budgie-wm.
 
@@ -298,27 +386,26 @@ class WayfireBridge:
         mode = settings.get_string('window-focus-mode')
         log.info("Focus mode changed to: %s", mode)
 
-        if mode == 'click':
-            # Disable follow-focus entirely by removing it from plugins
-            self._remove_plugin('follow-focus')
-            # Clean up its section so there's no stale config
-            self.config_manager.set_value('follow-focus', 'change_view', 'false')
-        elif mode == 'sloppy':
-            # Focus follows mouse but don't raise
-            self._ensure_plugin('follow-focus')
-            self.config_manager.set_value('follow-focus', 'change_view', 'true')
-            self.config_manager.set_value('follow-focus', 'change_output', 'true')
-            self.config_manager.set_value('follow-focus', 'raise_on_top', 'false')
-        elif mode == 'mouse':
-            # Focus follows mouse AND raise the window
-            self._ensure_plugin('follow-focus')
-            self.config_manager.set_value('follow-focus', 'change_view', 'true')
-            self.config_manager.set_value('follow-focus', 'change_output', 'true')
-            self.config_manager.set_value('follow-focus', 'raise_on_top', 'true')
-
-        if not self.delay_config_write:
-            self.config_manager.save()
-            self.config_manager.reload_wayfire()
+        # Plugin list and follow-focus options are committed together
+        with self.config_manager.transaction():
+            if mode == 'click':
+                # Disable follow-focus entirely by removing it from plugins
+                self._remove_plugin('follow-focus')
+                # Clean up its section so there's no stale config
+                self.config_manager.set_value('follow-focus', 'change_view', 'false')
+            elif mode == 'sloppy':
+                # Focus follows mouse but don't raise
+                self._ensure_plugin('follow-focus')
+                self.config_manager.set_value('follow-focus', 'change_view', 'true')
+                self.config_manager.set_value('follow-focus', 'change_output', 'true')
+                self.config_manager.set_value('follow-focus', 'raise_on_top', 'false')
+            elif mode == 'mouse':
+                # Focus follows mouse AND raise the window
+                self._ensure_plugin('follow-focus')
+                self.config_manager.set_value('follow-focus', 'change_view', 'true')
+                self.config_manager.set_value('follow-focus', 'change_output', 'true')
+                self.config_manager.set_value('follow-focus', 'raise_on_top', 'true')
+
     def _ensure_plugin(self, plugin_name: str):
         self.config_manager.ensure_plugin(plugin_name)
 
@@ -328,11 +415,9 @@ class WayfireBridge:
     def setup_panel_settings(self):
         """Setup monitoring for panel settings"""
         try:
-            source = Gio.SettingsSchemaSource.get_default()
-            if source.lookup('com.solus-project.budgie-panel', True):
-                panel_settings = Gio.Settings.new('com.solus-project.budgie-panel')
-                panel_settings.connect('changed::notification-position', self._on_panel_changed)
-                self.settings_objects['com.solus-project.budgie-panel'] = panel_settings
+            panel_settings = self._get_settings('com.solus-project.budgie-panel')
+            if panel_settings:
+                self._watch(panel_settings, ['notification-position'], self._on_panel_changed)
                 log.info("Panel settings monitoring enabled")
         except Exception:
             log.warning("Could not setup panel settings monitoring", exc_info=True)
@@ -340,83 +425,13 @@ class WayfireBridge:
     def setup_default_terminal(self):
         """Setup monitoring for default terminal"""
         try:
-            source = Gio.SettingsSchemaSource.get_default()
-            if source.lookup('org.gnome.desktop.default-applications.terminal', True):
-                terminal_settings = Gio.Settings.new('org.gnome.desktop.default-applications.terminal')
-                terminal_settings.connect('changed::exec', self._on_default_terminal_changed)
-                self.settings_objects['org.gnome.desktop.default-applications.terminal'] = terminal_settings
+            terminal_settings = self._get_settings('org.gnome.desktop.default-applications.terminal')
+            if terminal_settings:
+                self._watch(terminal_settings, ['exec'], self._on_default_terminal_changed)
                 log.info("Default terminal monitoring enabled")
         except Exception:
             log.warning("Could not setup default terminal monitoring", exc_info=True)
 
-    def _on_scroll_method_changed(self, settings, key):
-        """Handle scroll method change (two keys control one setting)"""
-        try:
-            two_finger = settings.get_boolean("two-finger-scrolling-enabled")
-            edge_scroll = settings.get_boolean("edge-scrolling-enabled")
-
-            scroll_method = 'two-finger' if two_finger else ('edge' if edge_scroll else 'none')
-
-            self.config_manager.set_value('input', 'scroll_method', scroll_method)
-            log.debug("Scroll method changed to: %s", scroll_method)
-
-            if not self.delay_config_write:
-                self.config_manager.save()
-                self.config_manager.reload_wayfire()
-        except Exception:
-            log.exception("Error handling scroll method change")
-
-    def _on_touchpad_left_handed_changed(self, settings, key):
-        """Handle touchpad left-handed change with 'mouse' mode support"""
-        try:
-            value = settings.get_string('left-handed')
-            log.debug("Touchpad left-handed changed to: %s", value)
-
-            if value == 'left':
-                result = 'true'
-            elif value == 'right':
-                result = 'false'
-            else:  # 'mouse' - follow mouse setting
-                mouse_settings = self.settings_objects.get('org.gnome.desktop.peripherals.mouse')
-                if mouse_settings:
-                    mouse_left_handed = mouse_settings.get_boolean('left-handed')
-                    result = 'true' if mouse_left_handed else 'false'
-                    log.debug("Touchpad follows mouse left-handed: %s", result)
-                else:
-                    result = 'false'
-
-            self.config_manager.set_value('input', 'touchpad_left_handed_mode', result)
-
-            if not self.delay_config_write:
-                self.config_manager.save()
-                self.config_manager.reload_wayfire()
-        except Exception:
-            log.exception("Error handling touchpad left-handed change")
-
-    def _on_mouse_left_handed_changed(self, settings, key):
-        """When mouse left-handed changes, update touchpad if in 'mouse' mode"""
-        try:
-            touchpad_settings = self.settings_objects.get('org.gnome.desktop.peripherals.touchpad')
-            if not touchpad_settings:
-                return
-
-            touchpad_mode = touchpad_settings.get_string('left-handed')
-            if touchpad_mode != 'mouse':
-                return  # Touchpad not following mouse
-
-            mouse_left_handed = settings.get_boolean('left-handed')
-            result = 'true' if mouse_left_handed else 'false'
-
-            log.debug("Mouse left-handed changed, updating touchpad (mouse mode): %s", result)
-
-            self.config_manager.set_value('input', 'touchpad_left_handed_mode', result)
-
-            if not self.delay_config_write:
-                self.config_manager.save()
-                self.config_manager.reload_wayfire()
-        except Exception:
-            log.exception("Error handling mouse left-handed change for touchpad")
-
     def _on_mutter_changed(self, settings, key):
         """Handle mutter settings changes"""
         try:
@@ -426,9 +441,7 @@ class WayfireBridge:
                 self.config_manager.set_value('place', 'mode', mode)
                 self._ensure_plugin('place')
                 log.info("Placement mode set to: %s", mode)
-                if not self.delay_config_write:
-                    self.config_manager.save()
-                    self.config_manager.reload_wayfire()
+                self.config_manager.save()
             elif key == 'overlay-key':
                 self._apply_overlay_key(settings.get_string(key))
 
@@ -473,9 +486,7 @@ class WayfireBridge:
         self.config_manager.set_value('command', 'binding_budgie_menu', wayfire_binding)
         self.config_manager.set_value('command', 'command_budgie_menu', budgie_panel_command)
 
-        if not self.delay_config_write:
-            self.config_manager.save()
-            self.config_manager.reload_wayfire()
+        self.config_manager.save()
 
     def _on_panel_changed(self, settings, key):
         """Handle panel settings changes"""
@@ -499,9 +510,7 @@ class WayfireBridge:
                     self.config_manager.set_value('notifications', 'vertical_position', v_pos)
                     self.config_manager.set_value('notifications', 'horizontal_position', h_pos)
 
-                    if not self.delay_config_write:
-                        self.config_manager.save()
-                        self.config_manager.reload_wayfire()
+                    self.config_manager.save()
 
         except Exception:
             log.exception("Error handling panel settings change")
@@ -519,79 +528,101 @@ class WayfireBridge:
                     self.config_manager.set_value('command', 'command_launch_terminal', terminal)
                     log.info("Updated terminal command to: %s", terminal)
 
-                    if not self.delay_config_write:
-                        self.config_manager.save()
-                        self.config_manager.reload_wayfire()
+                    self.config_manager.save()
 
         except Exception:
             log.exception("Error handling default terminal change")
 
     def setup_gsettings(self):
-        """Setup gsettings monitoring for all mapped keys"""
-        for (schema, key), mapping in GSETTINGS_MAPPINGS.items():
-            try:
-                section = mapping['section']
-                option = mapping['option']
-                transform_name = mapping.get('transform', 'str')
-
-                # Get transform function
-                transform = getattr(self.transforms, transform_name)
+        """Setup gsettings monitoring for all mapped keys.
 
-                # Check if schema exists
-                source = Gio.SettingsSchemaSource.get_default()
-                if not source.lookup(schema, True):
+        Values are applied later, once, by bridge_config().
+        """
+        for schema, keys in self.gsettings_dispatch.items():
+            try:
+                settings = self._get_settings(schema)
+                if not settings:
                     log.warning("Schema %s not found, skipping", schema)
                     continue
 
-                # Create settings object if not already cached
-                if schema not in self.settings_objects:
-                    self.settings_objects[schema] = Gio.Settings.new(schema)
+                schema_obj = settings.props.settings_schema
+                for key in list(keys):
+                    if not schema_obj.has_key(key):
+                        log.warning("Key %s not in schema %s, skipping", key, schema)
+                        del keys[key]
 
-                settings = self.settings_objects[schema]
+                if self.sync_once:
+                    continue
+                # One handler per schema; the key is looked up on each change
+                settings.connect('changed', self._on_schema_changed, schema)
+                arm_change_notifications(settings, keys)
+
+            except Exception:
+                log.exception("Error setting up %s", schema)
 
-                # Apply initial value
-                self._apply_setting(schema, key, section, option, transform)
+    def _on_schema_changed(self, settings, key: str, schema: str):
+        """Dispatch a change on a mapped schema to the key's mapping"""
+        mapping = self.gsettings_dispatch[schema].get(key)
+        if mapping is None:
+            return
+        if mapping.merge:
+            self._apply_merged_bindings(mapping.section, mapping.option)
+            self.config_manager.save()
+            return
+        if mapping.throttle_ms:
+            self.throttle.submit(
+                (schema, key), mapping.throttle_ms,
+                apply=lambda: self._apply_throttled(mapping),
+                settle=self.config_manager.save,
+            )
+            return
+        self._on_setting_changed(schema, key, mapping.section, mapping.option,
+                                 mapping.transform)
+
+    def _apply_throttled(self, mapping: CompiledMapping):
+        """Apply one step of a throttled burst: live only, no write yet"""
+        log.debug("Setting changed (throttled): %s::%s", mapping.schema, mapping.key)
+        self._apply_setting(mapping.schema, mapping.key, mapping.section,
+                            mapping.option, mapping.transform)
+        self.config_manager.push_live([(mapping.section, mapping.option)])
+
+    def _apply_merged_bindings(self, section: str, option: str):
+        """Write the union of every source key's bindings to one option.
+
+        maximize, unmaximize and toggle-maximized all land on
+        [wm-actions] toggle_maximize; none of them may drop the others'
+        bindings. Duplicates are dropped, first occurrence wins.
+        """
+        try:
+            bindings: Dict[str, None] = {}
+            for mapping in self.binding_merges[(section, option)]:
+                # Keys setup_gsettings() dropped are not in the schema
+                if mapping.key not in self.gsettings_dispatch.get(mapping.schema, {}):
+                    continue
+                settings = self._reader(mapping.schema)
+                if not settings:
+                    continue
+                value = mapping.transform(settings.get_value(mapping.key).unpack())
+                for binding in str(value).split('|'):
+                    binding = binding.strip()
+                    if binding:
+                        bindings[binding] = None
 
-                # Connect change signal
-                settings.connect(
-                    f'changed::{key}',
-                    lambda s, k, sc=schema, se=section, o=option, t=transform:
-                        self._on_setting_changed(sc, k, se, o, t)
-                )
+            merged = ' | '.join(bindings)
+            self.config_manager.set_value(section, option, merged)
+            log.debug("Applied merged bindings -> [%s] %s = %s", section, option, merged)
 
-            except Exception:
-                log.exception("Error setting up %s::%s", schema, key)
+        except Exception:
+            log.exception("Error applying merged bindings for [%s] %s", section, option)
 
     def _apply_setting(self, schema: str, key: str, section: str,
                        option: str, transform):
         """Apply a gsettings value to the wayfire config"""
         try:
-            settings = self.settings_objects[schema]
+            settings = self._reader(schema)
             value = settings.get_value(key).unpack()
             transformed_value = transform(value)
 
-            # Special handling for keyboard layout - use fallback if empty
-            if option == 'xkb_layout' and not transformed_value:
-                # GSettings is empty, use the priority system
-                transformed_value = self.get_keyboard_layout()
-                log.debug("GSettings xkb_layout empty, using fallback: %s", transformed_value)
-
-            # Special handling for xkb_options - use fallback if empty
-            elif option == 'xkb_options' and not transformed_value:
-                # GSettings is empty, use the priority system
-                transformed_value = self.get_merged_xkb_options()
-                log.debug("GSettings xkb_options empty, using fallback: %s", transformed_value)
-
-            # Special handling for touchpad_left_handed with 'mouse' mode
-            elif option == 'touchpad_left_handed_mode' and transformed_value == 'mouse':
-                mouse_settings = self.settings_objects.get('org.gnome.desktop.peripherals.mouse')
-                if mouse_settings:
-                    mouse_left_handed = mouse_settings.get_boolean('left-handed')
-                    transformed_value = 'true' if mouse_left_handed else 'false'
-                    log.debug("Touchpad follows mouse left-handed: %s", transformed_value)
-                else:
-                    transformed_value = 'false'
-
             log.debug(
                 "Applying %s::%s  raw=%r (%s)  transformed=%r (%s)  target=[%s] %s",
                 schema, key,
@@ -615,138 +646,77 @@ class WayfireBridge:
         """Handle a gsettings change event"""
         log.debug("Setting changed: %s::%s", schema, key)
 
-        # If input-sources changed, regenerate environment file AND update config
-        if schema == 'org.gnome.desktop.input-sources':
-            self.write_environment_file()
-            # Also write directly to wayfire.ini
-            self._apply_setting(schema, key, section, option, transform)
-
         # If cursor settings changed, regenerate environment file
-        elif schema == 'org.gnome.desktop.interface' and key in ('cursor-theme', 'cursor-size'):
+        if schema == 'org.gnome.desktop.interface' and key in ('cursor-theme', 'cursor-size'):
             self.write_environment_file()
 
         else:
             self._apply_setting(schema, key, section, option, transform)
 
-        if not self.delay_config_write:
-            self.config_manager.save()
-            self.config_manager.reload_wayfire()
-
-    def get_keyboard_layout(self):
-        """Get keyboard layout from GSettings, locale1, or fallback"""
-        # 1. GSettings input-sources
-        if 'org.gnome.desktop.input-sources' in self.settings_objects:
-            settings = self.settings_objects['org.gnome.desktop.input-sources']
-            sources = settings.get_value('sources').unpack()
-
-            layout_parts = []
-            for source in sources:
-                if len(source) >= 2 and source[0] == 'xkb':
-                    extract = source[1].replace("'", "")
-                    if '+' in extract:
-                        rhs = extract.split('+')
-                        extract = f"{rhs[0]}({rhs[1]})"
-                    layout_parts.append(extract)
-
-            if layout_parts:
-                layout = ','.join(layout_parts)
-                log.debug("Using keyboard layout from GSettings: %s", layout)
-                return layout
-
-        # 2. systemd-localed
-        if self.dbus_system_bus:
-            props = get_locale1_all_properties(self.dbus_system_bus)
-            if props:
-                layout = props.get('X11Layout', '')
-                variant = props.get('X11Variant', '')
-                formatted = format_keyboard_layout(str(layout), str(variant))
-                if formatted:
-                    log.debug("Using keyboard layout from locale1: %s", formatted)
-                    return formatted
-
-        # 3. /etc/default/keyboard
-        keyboard_config = read_key_value_file('/etc/default/keyboard', strip_quotes=True)
-        layout = keyboard_config.get('XKBLAYOUT', '')
-        variant = keyboard_config.get('XKBVARIANT', '')
-        formatted = format_keyboard_layout(layout, variant)
-        if formatted:
-            log.debug("Using keyboard layout from /etc/default/keyboard: %s", formatted)
-            return formatted
-
-        # 4. Default
-        log.debug("Using default keyboard layout: us")
-        return 'us'
-
-    def get_merged_xkb_options(self):
-        """Get XKB options with priority: user GSettings > locale1 > /etc/default/keyboard > default"""
-        options_set = set()
-        gsettings_default = set()
-
-        # 1. GSettings (if user-modified)
-        if 'org.gnome.desktop.input-sources' in self.settings_objects:
-            settings = self.settings_objects['org.gnome.desktop.input-sources']
-            try:
-                user_value = settings.get_user_value('xkb-options')
-                if user_value is not None:
-                    gsettings_options = settings.get_strv('xkb-options')
-                    options_set = set(gsettings_options)
-                    log.debug("Using USER GSettings XKB options: %s", options_set)
-                else:
-                    gsettings_options = settings.get_strv('xkb-options')
-                    if gsettings_options:
-                        gsettings_default = set(gsettings_options)
-                    log.debug("GSettings xkb-options not user-modified")
-            except Exception:
-                log.debug("Could not read GSettings xkb-options", exc_info=True)
-
-        # 2. systemd-localed
-        if not options_set and self.dbus_system_bus:
-            props = get_locale1_all_properties(self.dbus_system_bus)
-            if props and 'X11Options' in props:
-                options_set = parse_options_string(str(props['X11Options']))
-                if options_set:
-                    log.debug("Got XKB options from locale1: %s", options_set)
-
-        # 3. /etc/default/keyboard
-        if not options_set:
-            keyboard_config = read_key_value_file('/etc/default/keyboard', strip_quotes=True)
-            options_set = parse_options_string(keyboard_config.get('XKBOPTIONS', ''))
-            if options_set:
-                log.debug("Got XKB options from /etc/default/keyboard: %s", options_set)
-
-        # 4. GSettings default (if nothing else found)
-        if not options_set and gsettings_default:
-            options_set = gsettings_default
-            log.debug("Using DEFAULT GSettings XKB options: %s", options_set)
-
-        if not options_set:
-            log.debug("No XKB options found from any source")
-            options_set = set()
-
-        # Normalize
-        options_set = normalize_xkb_options(options_set)
-
-        # Inject grp:alt_shift_toggle if multiple layouts and no grp: option
-        current_layout = self.get_keyboard_layout()
-        has_multiple_layouts = ',' in current_layout
-        has_grp_option = any(opt.startswith('grp:') for opt in options_set)
-
-        if has_multiple_layouts and not has_grp_option:
-            options_set.add('grp:alt_shift_toggle')
-            log.debug("Injected grp:alt_shift_toggle for multiple layouts")
-
-        result = ','.join(sorted(options_set))
-        log.debug("Final XKB options: %s", result)
-        return result
+        self.config_manager.save()
+
+    # ------------------------------------------------------------------
+    # Derived options (see DERIVED_OPTIONS)
+    # ------------------------------------------------------------------
+
+    def derive_scroll_method(self):
+        """Two keys control one setting"""
+        touchpad = self._reader('org.gnome.desktop.peripherals.touchpad')
+        if not touchpad:
+            return {}
+        two_finger = touchpad.get_boolean('two-finger-scrolling-enabled')
+        edge_scroll = touchpad.get_boolean('edge-scrolling-enabled')
+        scroll_method = 'two-finger' if two_finger else ('edge' if edge_scroll else 'none')
+        return {('input', 'scroll_method'): scroll_method}
+
+    def derive_touchpad_left_handed(self):
+        """Touchpad left-handed, with 'mouse' following the mouse setting"""
+        touchpad = self._reader('org.gnome.desktop.peripherals.touchpad')
+        if not touchpad:
+            return {}
+        result = self.transforms.touchpad_left_handed(touchpad.get_string('left-handed'))
+        if result == 'mouse':
+            mouse_settings = self._reader('org.gnome.desktop.peripherals.mouse')
+            mouse_left_handed = bool(mouse_settings) and mouse_settings.get_boolean('left-handed')
+            result = 'true' if mouse_left_handed else 'false'
+            log.debug("Touchpad follows mouse left-handed: %s", result)
+        return {('input', 'touchpad_left_handed_mode'): result}
+
+    def derive_xkb_layout(self):
+        """GSettings input sources, else the priority system"""
+        state = self.keyboard.resolve()
+        return {
+            ('input', 'xkb_layout'): state.layouts,
+            ('input', 'xkb_variant'): state.variants,
+        }
+
+    def derive_xkb_options(self):
+        """Merged XKB options, the same the environment file gets"""
+        return {('input', 'xkb_options'): self.keyboard.resolve().options}
+
+    def derive_edge_tiling(self):
+        """Handle edge-tiling from com.solus-project.budgie-wm.
+
+        labwc maps this to <snapping><range> of 10 or 0.
+
+        In Wayfire, aero-snap is controlled by TWO settings:
+        [move] enable_snap   — master switch for edge snapping during drag
+        [grid] mouse_snap    — whether dragging to edge triggers a grid slot
+
+        Both must be toggled together to match labwc behaviour. The grid and
+        move plugins are always loaded by ensure_wm_plugins().
+        """
+        budgie_wm = self._reader('com.solus-project.budgie-wm')
+        if not budgie_wm:
+            return {}
+        value = 'true' if budgie_wm.get_boolean('edge-tiling') else 'false'
+        return {('move', 'enable_snap'): value, ('grid', 'mouse_snap'): value}
 
     def get_locale_from_locale1(self):
         """Get locale settings from systemd-localed"""
         locale_vars = {}
 
-        if not self.dbus_system_bus:
-            return locale_vars
-
-        props = get_locale1_all_properties(self.dbus_system_bus)
+        props = self.locale1.get_all()
         if not props or 'Locale' not in props:
             return locale_vars
 
@@ -759,7 +729,11 @@ class WayfireBridge:
         return locale_vars
 
     def write_environment_file(self):
-        """Write environment file with keyboard, cursor, and locale settings"""
+        """Write environment file with keyboard, cursor, and locale settings.
+
+        The file is only rewritten when its content changes, and only the
+        variables that changed are passed on to the running session.
+        """
         env_file = self.config_manager.config_path.parent / 'environment'
 
         fully_managed_vars = {
@@ -770,16 +744,24 @@ class WayfireBridge:
             'LC_ADDRESS', 'LC_TELEPHONE', 'LC_MEASUREMENT', 'LC_IDENTIFICATION'
         }
 
-        existing_vars = read_key_value_file(str(env_file))
+        try:
+            existing_text = env_file.read_text()
+        except FileNotFoundError:
+            existing_text = None
+        except OSError:
+            log.debug("Could not read %s", env_file, exc_info=True)
+            existing_text = None
+        existing_vars = parse_key_value_text(existing_text or '')
         new_vars = {}
 
         # Keyboard layout and options
-        new_vars['XKB_DEFAULT_LAYOUT'] = self.get_keyboard_layout()
-        new_vars['XKB_DEFAULT_OPTIONS'] = self.get_merged_xkb_options()
+        keyboard = self.keyboard.resolve()
+        new_vars['XKB_DEFAULT_LAYOUT'] = keyboard.layout
+        new_vars['XKB_DEFAULT_OPTIONS'] = keyboard.options
 
         # Cursor settings
         if 'org.gnome.desktop.interface' in self.settings_objects:
-            settings = self.settings_objects['org.gnome.desktop.interface']
+            settings = self._reader('org.gnome.desktop.interface')
             cursor_theme = settings.get_string('cursor-theme')
             if cursor_theme:
                 new_vars['XCURSOR_THEME'] = cursor_theme
@@ -803,21 +785,6 @@ class WayfireBridge:
             if 'LANG' not in new_vars:
                 new_vars['LANG'] = 'en_US.UTF-8'
 
-        # Check if keyboard layout or XKB options changed
-        keyboard_changed = False
-        if 'XKB_DEFAULT_LAYOUT' in existing_vars:
-            if existing_vars['XKB_DEFAULT_LAYOUT'] != new_vars['XKB_DEFAULT_LAYOUT']:
-                keyboard_changed = True
-                log.info("Keyboard layout changed: %s -> %s",
-                        existing_vars['XKB_DEFAULT_LAYOUT'],
-                        new_vars['XKB_DEFAULT_LAYOUT'])
-        if 'XKB_DEFAULT_OPTIONS' in existing_vars:
-            if existing_vars['XKB_DEFAULT_OPTIONS'] != new_vars['XKB_DEFAULT_OPTIONS']:
-                keyboard_changed = True
-                log.info("XKB options changed: %s -> %s",
-                        existing_vars['XKB_DEFAULT_OPTIONS'],
-                        new_vars['XKB_DEFAULT_OPTIONS'])
-
         # Merge: keep user vars, update managed ones
         final_vars = {}
         for key, value in existing_vars.items():
@@ -825,9 +792,6 @@ class WayfireBridge:
                 final_vars[key] = value
         final_vars.update(new_vars)
 
-        # Write file
-        env_file.parent.mkdir(parents=True, exist_ok=True)
-
         lines = [
             "# Budgie Desktop - Wayfire environment configuration\n",
             "# Variables fully managed by budgie: XKB_DEFAULT_*, XCURSOR_*, LC_*, LANG\n",
@@ -851,31 +815,34 @@ class WayfireBridge:
             for key in sorted(other_vars.keys()):
                 lines.append(f"{key}={other_vars[key]}\n")
 
-        with open(env_file, "w") as f:
-            f.writelines(lines)
+        content = ''.join(lines)
+        if content == existing_text:
+            log.debug("Environment file unchanged, not rewriting %s", env_file)
+            return
 
+        atomic_write_text(env_file, content)
         log.info("Updated environment file: %s", env_file)
 
-        # Warn if keyboard settings changed
-        if keyboard_changed:
-            log.warning(
-                "Keyboard layout or options changed. "
-                "A Wayfire RESTART is required for changes to take effect. "
-                "Run: pkill wayfire && wayfire"
+        if self.session_env is not None:
+            changed = {k: v for k, v in final_vars.items() if existing_vars.get(k) != v}
+            for key, value in changed.items():
+                log.debug("%s changed: %s -> %s", key, existing_vars.get(key), value)
+            self.session_env.update(
+                changed, [k for k in existing_vars if k not in final_vars]
             )
 
     def bridge_config(self):
-        """Perform initial sync of all settings to wayfire config"""
+        """Compute the desired config from every input, applying each exactly once"""
         log.info("Performing initial bridge config sync")
 
         # Ensure all required plugins are in [core] plugins list
         self.config_manager.ensure_wm_plugins()
 
         # Log layout switching status so it's visible in journal
-        layout = self.get_keyboard_layout()
+        keyboard = self.keyboard.resolve()
+        layout = keyboard.layout
         if ',' in layout:
-            options = self.get_merged_xkb_options()
-            grp = next((o for o in options.split(',') if o.startswith('grp:')), None)
+            grp = next((o for o in keyboard.options.split(',') if o.startswith('grp:')), None)
             log.info(
                 "Multiple keyboard layouts detected (%s). "
                 "Layout switching via xkb_options: %s. "
@@ -885,74 +852,28 @@ class WayfireBridge:
                 grp or 'none set — grp:alt_shift_toggle will be injected'
             )
 
-        self.delay_config_write = True
-
-        try:
-            # Sync all peripheral settings
-            if 'org.gnome.desktop.peripherals.touchpad' in self.settings_objects:
-                touchpad = self.settings_objects['org.gnome.desktop.peripherals.touchpad']
-                touchpad_keys = [
-                    'natural-scroll', 'left-handed', 'speed',
-                    'tap-to-click', 'disable-while-typing',
-                    'click-method', 'send-events',
-                    'tap-and-drag',
-                    'tap-and-drag-lock',
-                    'middle-click-emulation',
-                    'tap-button-map',
-                    'accel-profile'
-                ]
-                for key in touchpad_keys:
-                    try:
-                        # Find the mapping for this key
-                        full_key = ('org.gnome.desktop.peripherals.touchpad', key)
-                        if full_key in GSETTINGS_MAPPINGS:
-                            mapping = GSETTINGS_MAPPINGS[full_key]
-                            transform = getattr(self.transforms, mapping.get('transform', 'str'))
-                            self._apply_setting(
-                                'org.gnome.desktop.peripherals.touchpad',
-                                key,
-                                mapping['section'],
-                                mapping['option'],
-                                transform
-                            )
-                    except Exception:
-                        log.debug("Could not sync touchpad key %s", key, exc_info=True)
-
-                # Special handling for scroll method
-                try:
-                    self._on_scroll_method_changed(touchpad, 'two-finger-scrolling-enabled')
-                except Exception:
-                    log.debug("Could not sync scroll method", exc_info=True)
+        # Everything below commits as one write
+        with self.config_manager.transaction():
+            # Every directly mapped key
+            for schema, keys in self.gsettings_dispatch.items():
+                if schema not in self.settings_objects:
+                    continue
+                for key, mapping in keys.items():
+                    if mapping.merge:
+                        continue
+                    self._apply_setting(schema, key, mapping.section, mapping.option,
+                                        mapping.transform)
 
-            # Sync all mouse settings
-            if 'org.gnome.desktop.peripherals.mouse' in self.settings_objects:
-                mouse = self.settings_objects['org.gnome.desktop.peripherals.mouse']
-                mouse_keys = ['natural-scroll', 'left-handed', 'speed', 'accel-profile','middle-click-emulation']
-                for key in mouse_keys:
-                    try:
-                        full_key = ('org.gnome.desktop.peripherals.mouse', key)
-                        if full_key in GSETTINGS_MAPPINGS:
-                            mapping = GSETTINGS_MAPPINGS[full_key]
-                            transform = getattr(self.transforms, mapping.get('transform', 'str'))
-                            self._apply_setting(
-                                'org.gnome.desktop.peripherals.mouse',
-                                key,
-                                mapping['section'],
-                                mapping['option'],
-                                transform
-                            )
-                    except Exception:
-                        log.debug("Could not sync mouse key %s", key, exc_info=True)
+            # Keybinding options with several source keys, once each
+            for section, option in self.binding_merges:
+                self._apply_merged_bindings(section, option)
 
-                # Double-click time
-                try:
-                    self._on_double_click_changed(mouse, 'double-click')
-                except Exception:
-                    log.debug("Could not sync double-click time", exc_info=True)
+            # Options derived from more than one input
+            self.derived.recompute_all()
 
             # Sync mutter settings
             if 'org.gnome.mutter' in self.settings_objects:
-                mutter = self.settings_objects['org.gnome.mutter']
+                mutter = self._reader('org.gnome.mutter')
                 for key in ['center-new-windows', 'overlay-key']:
                     try:
                         self._on_mutter_changed(mutter, key)
@@ -961,7 +882,7 @@ class WayfireBridge:
 
             # Sync panel settings
             if 'com.solus-project.budgie-panel' in self.settings_objects:
-                panel = self.settings_objects['com.solus-project.budgie-panel']
+                panel = self._reader('com.solus-project.budgie-panel')
                 try:
                     self._on_panel_changed(panel, 'notification-position')
                 except Exception:
@@ -969,7 +890,7 @@ class WayfireBridge:
 
             # Sync default terminal
             if 'org.gnome.desktop.default-applications.terminal' in self.settings_objects:
-                terminal = self.settings_objects['org.gnome.desktop.default-applications.terminal']
+                terminal = self._reader('org.gnome.desktop.default-applications.terminal')
                 try:
                     self._on_default_terminal_changed(terminal, 'exec')
                 except Exception:
@@ -977,35 +898,18 @@ class WayfireBridge:
 
             # Sync focus mode from budgie-wm
             if 'com.solus-project.budgie-wm' in self.settings_objects:
-                budgie_wm = self.settings_objects['com.solus-project.budgie-wm']
+                budgie_wm = self._reader('com.solus-project.budgie-wm')
                 try:
                     self._on_budgie_wm_focus_changed(budgie_wm)
                 except Exception:
                     log.debug("Could not sync budgie-wm focus mode", exc_info=True)
-                try:
-                    self._on_edge_tiling_changed(budgie_wm)
-                except Exception:
-                    log.debug("Could not sync edge-tiling", exc_info=True)
-
-            # Sync placement mode
-            if 'org.gnome.mutter' in self.settings_objects:
-                mutter = self.settings_objects['org.gnome.mutter']
-                try:
-                    self._on_mutter_changed(mutter, 'center-new-windows')
-                except Exception:
-                    log.debug("Could not sync mutter center-new-windows", exc_info=True)
-
-        finally:
-            self.delay_config_write = False
-            self.config_manager.save()
-            log.info("Initial bridge config sync complete")
 
     def run(self):
         """Run the bridge (blocking)"""
         log.info(
             "Wayfire Bridge started – config=%s  monitoring %d gsettings keys",
             self.config_manager.config_path,
-            len(GSETTINGS_MAPPINGS),
+            sum(len(keys) for keys in self.gsettings_dispatch.values()),
         )
 
         # Run main loop
@@ -1014,3 +918,9 @@ class WayfireBridge:
             loop.run()
         except KeyboardInterrupt:
             log.info("Keyboard interrupt received – shutting down Wayfire Bridge")
+        finally:
+            # Don't lose changes still waiting for their quiet window
+            self.throttle.flush()
+            self.config_manager.flush_pending()
+            self.keyboard.close()
+            self.ipc.close()
@@ -7,6 +7,7 @@ import gi
 gi.require_version('Gio', '2.0')
 from gi.repository import Gio
 
+from .dconf_snapshot import arm_change_notifications
 from .logging_config import get_logger
 
 log = get_logger(__name__)
@@ -98,22 +99,33 @@ class BudgieWMActionsHandler:
             self.settings_by_schema[schema] = Gio.Settings.new(schema)
         return self.settings_by_schema[schema]
 
-    def setup(self):
-        """Setup monitoring for Budgie WM action keys"""
+    def setup(self, snapshot=None, apply: bool = True, watch: bool = True):
+        """Setup monitoring for Budgie WM action keys.
+
+        Initial values are read from snapshot (a SettingsSnapshot) if given;
+        with apply=False only the watchers are connected, with watch=False
+        only the values are applied.
+        """
         try:
-            for key, mapping in BUDGIE_WM_ACTION_MAPPINGS.items():
-                schema = mapping.get('schema', _BUDGIE_WM_SCHEMA)
-                settings = self._get_or_create_settings(schema)
-                if settings is None:
-                    continue
-                try:
-                    self._apply_action_key(key, mapping, settings)
-                    settings.connect(
-                        f'changed::{key}',
-                        lambda s, k, m=mapping, gk=key: self._on_action_key_changed(gk, m, s),
-                    )
-                except Exception:
-                    log.exception("Error setting up Budgie WM action %s", key)
+            with self.config_manager.transaction():
+                for key, mapping in BUDGIE_WM_ACTION_MAPPINGS.items():
+                    schema = mapping.get('schema', _BUDGIE_WM_SCHEMA)
+                    settings = self._get_or_create_settings(schema)
+                    if settings is None:
+                        continue
+                    values = snapshot.view(schema) if snapshot else None
+                    try:
+                        if apply:
+                            self._apply_action_key(key, mapping, values or settings)
+                        if not watch:
+                            continue
+                        settings.connect(
+                            f'changed::{key}',
+                            lambda s, k, m=mapping, gk=key: self._on_action_key_changed(gk, m, s),
+                        )
+                        arm_change_notifications(settings, [key])
+                    except Exception:
+                        log.exception("Error setting up Budgie WM action %s", key)
 
             log.info(
                 "Budgie WM actions monitoring enabled (%d actions)",
@@ -184,4 +196,3 @@ class BudgieWMActionsHandler:
         log.debug("Budgie WM action changed: %s", key)
         self._apply_action_key(key, mapping, settings)
         self.config_manager.save()
-        self.config_manager.reload_wayfire()
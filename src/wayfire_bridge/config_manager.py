@@ -2,91 +2,192 @@
 Configuration file management for Wayfire Bridge
 """
 
-import configparser
+import hashlib
+from contextlib import contextmanager
 from pathlib import Path
 import os
-import socket
-import json
-import struct
+import stat
+import tempfile
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
 
+from .ini_document import IniDocument
 from .logging_config import get_logger
 
 log = get_logger(__name__)
 
-def _wayfire_ipc_set_option(section: str, option: str, value: str) -> bool:
-    """
-    Send a wayfire/set-option IPC call to the live compositor.
-    Requires the ipc plugin to be loaded in wayfire.ini.
-    Returns True on success, False if IPC is unavailable or fails.
+
+def atomic_write_text(path, data: str):
+    """Replace path with data so watchers only ever see the complete file.
+
+    The content goes to a temp file in the same directory, is fsynced, and
+    is then renamed over the target. A crash at any point leaves either the
+    old file or the new one, never a truncated mix.
+
+    A symlinked path (dotfile managers) is written through: the link's
+    target is replaced, not the link.
     """
-    socket_path = os.environ.get('WAYFIRE_SOCKET')
-    if not socket_path:
-        log.debug("WAYFIRE_SOCKET not set, cannot send IPC")
-        return False
-
-    msg = json.dumps({
-        "method": "wayfire/set-option",
-        "data": {
-            "section": section,
-            "option": option,
-            "value": value,
-        }
-    }).encode('utf-8')
+    path = Path(path).resolve()
+    path.parent.mkdir(parents=True, exist_ok=True)
 
     try:
-        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
-            sock.settimeout(2.0)
-            sock.connect(socket_path)
-            # Wire format: 4-byte little-endian length, then message bytes
-            sock.sendall(struct.pack('<I', len(msg)) + msg)
-            # Read response: 4-byte length header first
-            header = sock.recv(4)
-            if len(header) < 4:
-                log.warning("IPC: short header response")
-                return False
-            resp_len = struct.unpack('<I', header)[0]
-            resp_data = b''
-            while len(resp_data) < resp_len:
-                chunk = sock.recv(resp_len - len(resp_data))
-                if not chunk:
-                    break
-                resp_data += chunk
-            response = json.loads(resp_data.decode('utf-8'))
-            if 'error' in response:
-                log.warning("IPC set-option error: %s", response['error'])
-                return False
-            log.debug("IPC set-option [%s] %s = %s -> %s", section, option, value, response)
-            return True
+        mode = stat.S_IMODE(path.stat().st_mode)
     except FileNotFoundError:
-        log.debug("WAYFIRE_SOCKET path not found: %s", socket_path)
-        return False
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    # Persist the rename itself
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        log.debug("Could not fsync directory %s", path.parent, exc_info=True)
+
+
+def parse_key_value_text(text: str, strip_quotes=False) -> Dict[str, str]:
+    """Parse key=value lines into a dict, skipping comments."""
+    config = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('#') and '=' in line:
+            key, value = line.split('=', 1)
+            if strip_quotes:
+                value = value.strip('"').strip("'")
+            config[key] = value
+    return config
+
+
+def read_key_value_file(filepath, strip_quotes=False):
+    """Read a key=value config file into a dict."""
+    if not os.path.exists(filepath):
+        return {}
+
+    try:
+        with open(filepath, 'r') as f:
+            return parse_key_value_text(f.read(), strip_quotes)
     except Exception:
-        log.debug("IPC call failed", exc_info=True)
-        return False
+        log.debug("Could not read %s", filepath, exc_info=True)
+        return {}
+
+
+# Sections Wayfire does not hot-reload from wayfire.ini; a file flush has
+# to push their changes over IPC as well
+_NOT_HOT_RELOADED = frozenset({'core'})
+
+
+def _flatten_value(value: str) -> str:
+    """Join a continued multi-line value (e.g. plugins) into one line for IPC."""
+    return ' '.join(value.replace('\\\n', ' ').split())
+
+
+_BOOL_WORDS = {
+    'true': 'true', 'yes': 'true', 'on': 'true',
+    'false': 'false', 'no': 'false', 'off': 'false',
+}
+
+
+def _normalize_value(value: str) -> Tuple[str, ...]:
+    """Comparable form of an option value.
+
+    Wayfire reports values in its own formatting (1.000000 for 1, true for
+    yes); tokens are compared numerically or as booleans where they parse.
+    """
+    tokens = []
+    for token in _flatten_value(value).split():
+        lowered = token.lower()
+        if lowered in _BOOL_WORDS:
+            tokens.append(_BOOL_WORDS[lowered])
+            continue
+        try:
+            tokens.append(repr(float(token)))
+        except ValueError:
+            tokens.append(token)
+    return tuple(tokens)
+
+
+class ConfigChange(NamedTuple):
+    """A pending change to one option since the last flush.
+
+    old is None if the option did not exist before; new is None if the
+    option has been removed.
+    """
+    section: str
+    option: str
+    old: Optional[str]
+    new: Optional[str]
+
 
 class ConfigManager:
     """Manages wayfire.ini configuration file"""
 
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, ipc_client=None):
         if config_path is None:
             self.config_path = Path.home() / '.config' / 'budgie-desktop' / 'wayfire' / 'wayfire.ini'
         else:
             self.config_path = Path(config_path)
 
-        # Use strict=False to allow duplicate keys (last one wins)
-        self.config = configparser.ConfigParser(
-            interpolation=None,
-            strict=False,  # Allow duplicate keys - last value wins
-            allow_no_value=True  # Allow keys without values
-        )
-        self.config.optionxform = str  # Preserve case sensitivity
+        # Optional WriteScheduler; when set, save() coalesces into one flush
+        self.scheduler = None
+
+        # Persistent WayfireIPCClient owned by the bridge (None: file only)
+        self.ipc = ipc_client
+
+        # IPC-first mode: save() pushes changes live and the file write
+        # waits for the scheduler's idle window
+        self.live_apply = False
+        # (section, option) -> value already pushed but not yet on disk
+        self._pushed: Dict[Tuple[str, str], str] = {}
+        # Options the running compositor did not take live; left to the file
+        self._rejected: Set[Tuple[str, str]] = set()
+
+        # Options the bridge has set, i.e. the desired state reconcile()
+        # checks the compositor against (ordered, values unused)
+        self._managed: Dict[Tuple[str, str], None] = {}
+        # (section, option) -> value as last read from or pushed to Wayfire
+        self.live_mirror: Dict[Tuple[str, str], str] = {}
+
+        # Digest of what is on disk, so identical rewrites can be skipped
+        self._last_digest = None
+        self.writes_performed = 0
+        self.writes_skipped = 0
+
+        # (section, option) -> ConfigChange, in the order first touched
+        self._journal: Dict[Tuple[str, str], ConfigChange] = {}
+
+        # Nesting depth of transaction(); saves are deferred while > 0
+        self._transaction_depth = 0
+        self._flush_deferred = False
+
+        # Format-preserving model: comments and layout of wayfire.ini survive
+        # every save, and only the lines of changed options are rewritten
+        self.config = IniDocument()
 
         # Load existing config or create new one
         if self.config_path.exists():
             try:
-                self.config.read(self.config_path)
+                raw = self.config_path.read_bytes()
+                self.config = IniDocument(raw.decode('utf-8'))
+                self._last_digest = hashlib.sha256(raw).hexdigest()
                 log.info("Loaded existing config from %s", self.config_path)
-            except configparser.Error as e:
+            except (OSError, UnicodeDecodeError) as e:
                 log.error("Error reading config file: %s", e)
                 log.warning("Creating backup and starting with fresh config")
                 # Backup the problematic file
@@ -110,25 +211,87 @@ class ConfigManager:
     # ------------------------------------------------------------------
 
     def set_value(self, section: str, option: str, value: str):
-        """Set a configuration value"""
-        if section not in self.config:
-            self.config[section] = {}
-        self.config[section][option] = value
+        """Set a configuration value (re-setting the current value is a no-op)"""
+        value = str(value)
+        self._managed[(section, option)] = None
+        old = self.config.get(section, option)
+        if old == value:
+            return
+        self.config.set(section, option, value)
+        self._record_change(section, option, old, value)
 
     def get_value(self, section: str, option: str, default=None):
         """Get a configuration value"""
-        if section in self.config and option in self.config[section]:
-            return self.config[section][option]
-        return default
+        return self.config.get(section, option, default)
 
     def remove_option(self, section: str, option: str):
         """Remove a configuration option"""
-        if section in self.config and option in self.config[section]:
-            del self.config[section][option]
+        self._managed.pop((section, option), None)
+        old = self.config.get(section, option)
+        if self.config.remove(section, option):
+            self._record_change(section, option, old, None)
 
     def has_option(self, section: str, option: str) -> bool:
         """Check if an option exists"""
-        return section in self.config and option in self.config[section]
+        return self.config.has_option(section, option)
+
+    def managed_options(self) -> List[Tuple[str, str]]:
+        """The (section, option) keys the bridge has set, in order."""
+        return list(self._managed)
+
+    def restore_managed(self, keys):
+        """Adopt keys as managed without setting them, for a skipped sync
+        whose values are known to be in wayfire.ini already."""
+        for section, option in keys:
+            self._managed[(section, option)] = None
+
+    # ------------------------------------------------------------------
+    # Change journal
+    # ------------------------------------------------------------------
+
+    def _record_change(self, section: str, option: str, old, new):
+        key = (section, option)
+        previous = self._journal.get(key)
+        if previous is not None:
+            # Keep the value from before the first unflushed change
+            old = previous.old
+        if old == new:
+            # Changed and changed back again: nothing left to do
+            self._journal.pop(key, None)
+        else:
+            self._journal[key] = ConfigChange(section, option, old, new)
+
+    def has_pending_changes(self) -> bool:
+        """True if any option differs from what was last flushed."""
+        return bool(self._journal)
+
+    def pending_changes(self) -> List[ConfigChange]:
+        """The exact delta since the last flush, oldest change first."""
+        return list(self._journal.values())
+
+    @contextmanager
+    def transaction(self):
+        """Group changes so they are committed together in one write.
+
+        Transactions nest: save() and flush() calls made anywhere inside are
+        deferred until the outermost transaction exits, which then commits
+        everything that changed.
+
+            with config_manager.transaction():
+                config_manager.set_value('move', 'enable_snap', 'true')
+                config_manager.set_value('grid', 'mouse_snap', 'true')
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                if self._flush_deferred:
+                    self._flush_deferred = False
+                    self.flush()
+                else:
+                    self.save()
 
     def ensure_wm_plugins(self):
         """Ensure all plugins required for WM keybinding mappings are loaded.
@@ -151,21 +314,18 @@ class ConfigManager:
 
     def _ensure_autostart_section(self):
         """Ensure the critical autostart section exists for budgie-desktop"""
-        if 'autostart' not in self.config:
-            self.config['autostart'] = {}
-
-        autostart = self.config['autostart']
-
-        if autostart.get('desktop') != 'budgie-desktop':
+        if self.config.get('autostart', 'desktop') != 'budgie-desktop':
             log.debug("Creating/updating autostart section for budgie-desktop")
 
-            autostart.setdefault(
-                '0_env',
-                'dbus-update-activation-environment --systemd WAYLAND_DISPLAY DISPLAY XAUTHORITY',
+            defaults = (
+                ('0_env', 'dbus-update-activation-environment --systemd WAYLAND_DISPLAY DISPLAY XAUTHORITY'),
+                ('autostart_wf_shell', 'false'),
+                ('portal', '/usr/libexec/xdg-desktop-portal'),
+                ('desktop', 'budgie-desktop'),
             )
-            autostart.setdefault('autostart_wf_shell', 'false')
-            autostart.setdefault('portal', '/usr/libexec/xdg-desktop-portal')
-            autostart.setdefault('desktop', 'budgie-desktop')
+            for option, value in defaults:
+                if not self.config.has_option('autostart', option):
+                    self.set_value('autostart', option, value)
 
             log.debug("Autostart section configured for budgie-desktop")
         else:
@@ -176,89 +336,368 @@ class ConfigManager:
     # ------------------------------------------------------------------
 
     def save(self):
-        """Write configuration to wayfire.ini"""
+        """Request that the configuration be written to wayfire.ini.
+
+        Nothing happens if no option actually changed. With a scheduler
+        attached the write is coalesced with any other changes arriving in
+        the same quiet window; otherwise it happens immediately.
+        """
+        if self._transaction_depth:
+            return
+        if not self._journal and not self._pushed:
+            log.debug("No configuration changes pending, nothing to save")
+            return
+        if self.live_apply and self.ipc is not None and self.scheduler is not None:
+            self._apply_live()
+        elif self.scheduler is not None:
+            self.scheduler.mark_dirty()
+        else:
+            self.flush()
+
+    def _apply_live(self):
+        """Push unpushed changes over IPC now and defer the file to idle time.
+
+        Removals cannot be expressed over IPC, and options the compositor
+        rejects are not live either; both fall back to the regular write
+        window, whose file reload applies them.
+        """
+        unpushed = self._unpushed_options()
+        options = {
+            key: value for key, value in unpushed.items() if key not in self._rejected
+        }
+        deferred = len(options) < len(unpushed) or any(
+            change.new is None for change in self._journal.values()
+        )
+
+        def rejected(keys):
+            log.info("Live apply of %d option(s) failed, falling back to file reload",
+                     len(keys))
+            if self.scheduler is not None:
+                self.scheduler.mark_dirty()
+
+        self._send_live(options, rejected)
+        self.scheduler.mark_dirty(idle=not deferred)
+
+    def push_live(self, keys):
+        """Send the current values of keys to the compositor now.
+
+        No write is scheduled: the caller saves later, and that save knows
+        these values are live already. Options the compositor rejects are
+        left to the file write of that save.
+        """
+        if self.ipc is None:
+            return
+        options = {
+            key: value for key, value in self._unpushed_options().items()
+            if key in keys and key not in self._rejected
+        }
+        self._send_live(options, lambda rejected: None)
+
+    def _send_live(self, options: Dict[Tuple[str, str], str],
+                   on_rejected: Callable[[Dict[Tuple[str, str], str]], None]):
+        """Push options now without letting one unknown key sink the rest.
+
+        The compositor rejects a whole set-config-options batch over a
+        single key it does not have: an autostart entry, a command binding,
+        an option of a plugin that isn't loaded. Keys it has confirmed
+        (live_mirror) go out at once as one batch; the others are read back
+        first, as replay() does, and pushed only if it knows them.
+        on_rejected(options) receives whatever did not go live.
+        """
+        if not options:
+            return
+        self._pushed.update(options)
+
+        confirmed = {key: value for key, value in options.items() if key in self.live_mirror}
+        self._send_batch(confirmed, on_rejected)
+
+        unconfirmed = [key for key in options if key not in confirmed]
+        if not unconfirmed:
+            return
+
+        def probed(live):
+            self._send_batch(
+                {key: options[key] for key in unconfirmed if live[key] is not None},
+                on_rejected,
+            )
+            self._unpush(
+                {key: options[key] for key in unconfirmed if live[key] is None},
+                on_rejected,
+            )
+
+        self._read_options(unconfirmed, probed)
+
+    def _send_batch(self, options: Dict[Tuple[str, str], str], on_rejected, split=True):
+        """One set-config-options call; a rejected batch is retried per option."""
+        if not options:
+            return
+
+        def done(success):
+            if success:
+                self.live_mirror.update(options)
+            elif split and len(options) > 1:
+                # Find the offending key(s) instead of losing them all
+                for key, value in options.items():
+                    if self._pushed.get(key) == value:
+                        self._send_batch({key: value}, on_rejected, split=False)
+            else:
+                self._unpush(options, on_rejected)
+
+        self.ipc.set_options(options, done)
+
+    def _unpush(self, options: Dict[Tuple[str, str], str], on_rejected):
+        """Leave options the compositor did not take to the file write."""
+        rejected = {
+            key: value for key, value in options.items() if self._pushed.get(key) == value
+        }
+        if not rejected:
+            return
+        for key in rejected:
+            del self._pushed[key]
+            log.debug("  [%s] %s not applied live", *key)
+        # Not worth offering again before the file reload
+        self._rejected.update(rejected)
+        on_rejected(rejected)
+
+    def flush_pending(self):
+        """Write immediately if a scheduled save is still outstanding."""
+        if self.scheduler is not None and self.scheduler.pending:
+            self.flush()
+
+    def flush(self):
+        """Write configuration to wayfire.ini now and let Wayfire reload it"""
+        if self._transaction_depth:
+            self._flush_deferred = True
+            return
+
+        if self.scheduler is not None:
+            self.scheduler.cancel()
+
         try:
-            # Ensure directory exists
-            self.config_path.parent.mkdir(parents=True, exist_ok=True)
+            data = self.config.serialize()
+            digest = hashlib.sha256(data.encode('utf-8')).hexdigest()
+            changes = self.pending_changes()
+            unpushed = self._unpushed_options()
+
+            if digest == self._last_digest:
+                self._journal.clear()
+                self._pushed.clear()
+                self._rejected.clear()
+                self.writes_skipped += 1
+                log.debug(
+                    "Configuration unchanged, skipping write (%d written, %d skipped)",
+                    self.writes_performed, self.writes_skipped,
+                )
+                # Live values may have been reverted to what is on disk; no
+                # reload will happen, and every one of them was pushed before
+                self._push_options(unpushed)
+                return
 
             log.debug("Saving configuration to %s", self.config_path)
 
             if log.isEnabledFor(10):  # DEBUG
-                if 'input' in self.config:
+                log.debug("Flushing %d changed option(s)", len(changes))
+                for change in changes:
                     log.debug(
-                        "[input] section has %d keys  xkb_layout=%r",
-                        len(self.config['input']),
-                        self.config['input'].get('xkb_layout', '<unset>'),
+                        "  [%s] %s: %r -> %r",
+                        change.section, change.option, change.old, change.new,
                     )
-                if 'command' in self.config:
-                    terminal_keys = [
-                        k for k in self.config['command'] if 'terminal' in k.lower()
-                    ]
-                    if terminal_keys:
-                        for k in terminal_keys:
-                            log.debug("[command] %s = %s", k, self.config['command'][k])
-
-            with open(self.config_path, 'w') as f:
-                self.config.write(f)
-                f.flush()
 
-            log.debug("Configuration written to %s", self.config_path)
+            atomic_write_text(self.config_path, data)
+
+            # Only forget the delta once it is safely on disk
+            self._journal.clear()
+            self._pushed.clear()
+            self._rejected.clear()
+            self._last_digest = digest
+            self.writes_performed += 1
+            log.debug(
+                "Configuration written to %s (%d written, %d skipped)",
+                self.config_path, self.writes_performed, self.writes_skipped,
+            )
 
         except Exception:
             log.exception("Error saving config to %s", self.config_path)
+            return
+
+        self.reload_wayfire()
+        # The reload applies everything else; [core] goes out as one batch
+        self._push_options({
+            key: value for key, value in unpushed.items()
+            if key[0] in _NOT_HOT_RELOADED
+        })
 
     def reload_wayfire(self):
         """Wayfire watches wayfire.ini and reloads it automatically.
 
         Note: [core] options like focus_mode are NOT reloaded from file —
-        use reload_wayfire_option() for those to apply changes at runtime via IPC.
+        flush() therefore also pushes changed [core] options over IPC.
         """
         log.debug("Wayfire will auto-reload configuration")
-        # Environment variables are only read at Wayfire startup
-        # A full restart is needed for XKB_DEFAULT_LAYOUT, XCURSOR_*, etc.
+        # Environment variables are only read at Wayfire startup; keyboard
+        # settings reach it live through [input] xkb_* instead
+
+    def _unpushed_options(self) -> Dict[Tuple[str, str], str]:
+        """Options whose current value the compositor has not been sent yet.
+
+        Covers the journal plus anything pushed live since the last flush,
+        so an option changed and then changed back is pushed back as well.
+        """
+        options = {
+            key: _flatten_value(change.new)
+            for key, change in self._journal.items() if change.new is not None
+        }
+        for key in self._pushed:
+            if key not in options:
+                value = self.config.get(*key)
+                if value is not None:
+                    options[key] = _flatten_value(value)
+        return {
+            key: value for key, value in options.items()
+            if self._pushed.get(key) != value
+        }
+
+    def _push_options(self, options: Dict[Tuple[str, str], str]):
+        if self.ipc is None or not options:
+            return
+
+        def done(success):
+            if success:
+                self.live_mirror.update(options)
+            else:
+                log.info(
+                    "Could not push %d option(s) via IPC "
+                    "(ipc plugin may not be loaded; values saved to file for next startup)",
+                    len(options)
+                )
+
+        # Non-blocking: the result arrives on the main loop
+        self.ipc.set_options(options, done)
 
-    def reload_wayfire_option(self, section: str, option: str, value: str):
-        """Push a single option change to the live Wayfire compositor via IPC.
+    # ------------------------------------------------------------------
+    # Compositor reconciliation
+    # ------------------------------------------------------------------
 
-        This is required for options that Wayfire does not hot-reload from the
-        config file, notably anything in [core] such as focus_mode.
+    def replay(self):
+        """Push the complete desired state to a newly started compositor.
 
-        Falls back silently if the ipc plugin is not loaded or WAYFIRE_SOCKET
-        is not set — the value is still written to wayfire.ini so it takes
-        effect on next Wayfire startup.
+        Options a compositor has confirmed before (live_mirror) go out at
+        once as one batch, including values pushed live to the previous
+        instance but not yet on disk. Any other managed option is read back
+        first and pushed only if the new instance knows it and holds a
+        different value: one unknown key (an autostart entry, a command
+        binding created since, a plugin that isn't loaded) would make the
+        compositor reject the whole batch.
         """
-        success = _wayfire_ipc_set_option(section, option, value)
-        if not success:
-            log.info(
-                "Could not push [%s] %s = %s via IPC "
-                "(ipc plugin may not be loaded; value saved to file for next startup)",
-                section, option, value
-            )
+        confirmed = set(self.live_mirror)
+        self.live_mirror.clear()
+        self._rejected.clear()
+        keys = [key for key in self._managed if self.config.has_option(*key)]
+
+        options = {
+            key: _flatten_value(self.config.get(*key))
+            for key in keys if key in confirmed
+        }
+        log.info("Replaying %d managed option(s) to the compositor", len(options))
+        self._push_options(options)
+
+        unconfirmed = [key for key in keys if key not in confirmed]
+        if not unconfirmed or self.ipc is None:
+            return
+
+        def compare(live):
+            known = {key: value for key, value in live.items() if value is not None}
+            self.live_mirror.update(known)
+            delta = self._differing(known)
+            log.debug("Replay: %d of %d unconfirmed option(s) known to the compositor, "
+                      "%d differ", len(known), len(unconfirmed), len(delta))
+            self._push_options(delta)
+
+        self._read_options(unconfirmed, compare)
+
+    def reconcile(self, callback: Optional[Callable[[Optional[int]], None]] = None):
+        """Bring the running compositor in line with the desired state.
+
+        Reads back every option the bridge manages over IPC (pipelined on
+        the one connection), records what Wayfire holds in live_mirror and
+        pushes only the options whose live value differs, as one batch.
+        Options Wayfire does not know (plugin not loaded) are left to the
+        file. callback(pushed) receives the number of options pushed, or
+        None if the compositor could not be queried at all.
+        """
+        def finish(result):
+            if callback is not None:
+                callback(result)
+
+        keys = [key for key in self._managed if self.config.has_option(*key)]
+        if self.ipc is None or not keys:
+            finish(None if self.ipc is None else 0)
+            return
+
+        def compare(live):
+            known = {key: value for key, value in live.items() if value is not None}
+            if not known:
+                log.debug("Reconcile: compositor did not answer, relying on wayfire.ini")
+                finish(None)
+                return
+            self.live_mirror.update(known)
+
+            delta = self._differing(known)
+            log.info("Reconcile: %d of %d managed option(s) differ from the compositor",
+                     len(delta), len(keys))
+            for (section, option), value in delta.items():
+                log.debug("  [%s] %s: live %r -> %r",
+                          section, option, known[(section, option)], value)
+            self._push_options(delta)
+            finish(len(delta))
+
+        self._read_options(keys, compare)
+
+    def _read_options(self, keys, callback: Callable[[Dict[Tuple[str, str], Optional[str]]], None]):
+        """Read keys back over IPC, pipelined; callback({key: live value or None})."""
+        live: Dict[Tuple[str, str], Optional[str]] = {}
+
+        def collect(key, value):
+            live[key] = value
+            if len(live) == len(keys):
+                callback(live)
+
+        for key in keys:
+            self.ipc.get_option(*key, lambda value, key=key: collect(key, value))
+
+    def _differing(self, live: Dict[Tuple[str, str], str]) -> Dict[Tuple[str, str], str]:
+        """Desired values of the keys whose live value differs."""
+        delta = {}
+        for key, value in live.items():
+            desired = self.config.get(*key)
+            if _normalize_value(desired) != _normalize_value(value):
+                delta[key] = _flatten_value(desired)
+        return delta
 
     def _ensure_ipc_plugin(self):
-        """Ensure the ipc plugin is in the plugins list so IPC calls work."""
-        if 'core' not in self.config:
+        """Ensure the IPC plugins are in the plugins list so IPC calls work.
+
+        ipc provides the socket; ipc-rules provides the wayfire/*-config-option
+        methods the bridge calls on it.
+        """
+        if not self.config.has_section('core'):
             return
-        plugins_str = self.config['core'].get('plugins', '')
-        if 'ipc' not in plugins_str.split():
-            # Append ipc to the plugins list
-            self.config['core']['plugins'] = plugins_str.rstrip() + ' \\\n  ipc'
-            log.info("Added ipc plugin to [core] plugins list")
+        for plugin in ('ipc', 'ipc-rules'):
+            self.ensure_plugin(plugin)
 
     def _get_plugins_list(self) -> list:
         """Return the current plugins list as a Python list of strings."""
-        if 'core' not in self.config:
-            return []
-        raw = self.config['core'].get('plugins', '')
+        raw = self.config.get('core', 'plugins', '')
         # Strip line continuations and split on whitespace
         cleaned = raw.replace('\\\n', ' ')
         return [p.strip() for p in cleaned.split() if p.strip()]
 
     def _set_plugins_list(self, plugins: list):
         """Write a plugins list back to [core] plugins."""
-        if 'core' not in self.config:
-            self.config['core'] = {}
-        self.config['core']['plugins'] = ' \\\n  '.join(plugins)
+        # Keep the shipped layout: "plugins = \\" then one plugin per line
+        raw = self.config.get('core', 'plugins', '')
+        lead = '\\\n' if raw.startswith('\\') else ''
+        self.set_value('core', 'plugins', lead + ' \\\n'.join(plugins))
 
     def ensure_plugin(self, plugin_name: str):
         """Add plugin_name to [core] plugins if not already present."""
@@ -0,0 +1,218 @@
+"""
+Bulk GSettings snapshot for Wayfire Bridge
+Reads the user's dconf database in one go instead of key by key
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+import gi
+
+gi.require_version('GLib', '2.0')
+gi.require_version('Gio', '2.0')
+from gi.repository import GLib, Gio
+
+from .gvdb import GvdbError, read_gvdb
+from .logging_config import get_logger
+
+log = get_logger(__name__)
+
+def _read_user_values(data: bytes) -> Dict[str, GLib.Variant]:
+    """Every value in a dconf database, keyed by full path and unboxed."""
+    boxed_type = GLib.VariantType.new('v')
+    return {
+        name: GLib.Variant.new_from_bytes(boxed_type, GLib.Bytes.new(raw), False).get_variant()
+        for name, raw in read_gvdb(data).items()
+    }
+
+
+def _dconf_profile_is_user_only() -> bool:
+    """True if the dconf profile is just the user database.
+
+    System databases can override schema defaults and lock keys; the
+    snapshot doesn't model either, so such setups read through Gio.
+    """
+    profile = os.environ.get('DCONF_PROFILE')
+    if profile:
+        candidates = [Path(profile)] if os.path.isabs(profile) else [
+            Path(directory) / 'dconf' / 'profile' / profile
+            for directory in ('/etc', *GLib.get_system_data_dirs())
+        ]
+    else:
+        candidates = [Path('/etc/dconf/profile/user')]
+        candidates += [Path(d) / 'dconf' / 'profile' / 'user' for d in GLib.get_system_data_dirs()]
+
+    for path in candidates:
+        try:
+            lines = path.read_text().splitlines()
+        except OSError:
+            continue
+        entries = [line.split('#', 1)[0].strip() for line in lines]
+        return [entry for entry in entries if entry] in ([], ['user-db:user'])
+    # No profile at all means the default, which is user-db:user
+    return True
+
+
+def _schema_cache_files() -> List[Path]:
+    dirs = [d for d in os.environ.get('GSETTINGS_SCHEMA_DIR', '').split(os.pathsep) if d]
+    dirs += [os.path.join(d, 'glib-2.0', 'schemas')
+             for d in (GLib.get_user_data_dir(), *GLib.get_system_data_dirs())]
+    return [Path(d) / 'gschemas.compiled' for d in dirs]
+
+
+def _fingerprint(database: bytes) -> str:
+    digest = hashlib.sha256(database)
+    # Schema defaults change with package upgrades; stat() is enough there
+    for path in _schema_cache_files():
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        digest.update(f'{path}:{st.st_size}:{st.st_mtime_ns}'.encode())
+    return digest.hexdigest()
+
+
+def arm_change_notifications(settings: Gio.Settings, keys: Iterable[str]):
+    """Read keys once from the live settings object after connecting to it.
+
+    GSettings only guarantees changed:: for a key that has been read while
+    a handler is connected; dconf happens to signal every key regardless,
+    other backends need not. Startup values come from the snapshot, so
+    without this the live object might never have read them.
+    """
+    schema = settings.props.settings_schema
+    for key in keys:
+        # get_value() aborts on a key the schema doesn't have
+        if schema.has_key(key):
+            settings.get_value(key)
+
+
+class SchemaSnapshot:
+    """Read-only settings values of one schema, with Gio.Settings-style getters."""
+
+    def __init__(self, schema_id: str, values: Mapping[str, GLib.Variant],
+                 user_keys: FrozenSet[str] = frozenset()):
+        self.schema_id = schema_id
+        self._values = values
+        # Keys whose value was set by the user rather than a schema default
+        self._user_keys = user_keys
+
+    def get_value(self, key: str) -> GLib.Variant:
+        return self._values[key]
+
+    def get_user_value(self, key: str) -> Optional[GLib.Variant]:
+        return self._values[key] if key in self._user_keys else None
+
+    def get_string(self, key: str) -> str:
+        return self._values[key].get_string()
+
+    def get_boolean(self, key: str) -> bool:
+        return self._values[key].get_boolean()
+
+    def get_int(self, key: str) -> int:
+        return self._values[key].get_int32()
+
+    def get_uint(self, key: str) -> int:
+        return self._values[key].get_uint32()
+
+    def get_double(self, key: str) -> float:
+        return self._values[key].get_double()
+
+    def get_strv(self, key: str) -> List[str]:
+        return self._values[key].get_strv()
+
+
+class SettingsSnapshot:
+    """Immutable point-in-time view of every setting the bridge reads.
+
+    With a plain user-only dconf setup the whole user database is read
+    from ~/.config/dconf/user in one file read, and schema defaults come
+    from the compiled schema cache, so building a schema view costs no
+    per-key GSettings calls. Otherwise (another GSettings backend, system
+    databases or locks in the dconf profile, an unreadable database) views
+    are filled through Gio.Settings, which is always correct.
+    """
+
+    def __init__(self, user_values: Optional[Mapping[str, GLib.Variant]],
+                 fingerprint: Optional[str] = None):
+        self._user_values = user_values
+        self._fingerprint = fingerprint
+        self._source = Gio.SettingsSchemaSource.get_default()
+        self._views: Dict[Tuple[str, Optional[str]], Optional[SchemaSnapshot]] = {}
+
+    @classmethod
+    def load(cls) -> 'SettingsSnapshot':
+        backend = os.environ.get('GSETTINGS_BACKEND', 'dconf')
+        if backend != 'dconf':
+            log.debug("GSETTINGS_BACKEND=%s, snapshot reads through Gio", backend)
+            return cls(None)
+        if not _dconf_profile_is_user_only():
+            log.debug("dconf profile has system databases, snapshot reads through Gio")
+            return cls(None)
+
+        path = Path(GLib.get_user_config_dir()) / 'dconf' / 'user'
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            # Nothing has been changed from the defaults yet
+            return cls(MappingProxyType({}), _fingerprint(b''))
+        except OSError as e:
+            log.debug("Cannot read %s (%s), snapshot reads through Gio", path, e)
+            return cls(None)
+
+        try:
+            values = _read_user_values(data)
+        except (GvdbError, GLib.Error, UnicodeDecodeError) as e:
+            log.warning("Could not parse dconf database %s: %s", path, e)
+            return cls(None)
+
+        log.debug("Loaded %d value(s) from %s", len(values), path)
+        return cls(MappingProxyType(values), _fingerprint(data))
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """Digest of everything the values derive from: the user database
+        and the compiled schema caches. None when reading through Gio."""
+        return self._fingerprint
+
+    def view(self, schema_id: str, path: Optional[str] = None) -> Optional[SchemaSnapshot]:
+        """Values of schema_id (at path, for relocatable schemas), or None."""
+        cache_key = (schema_id, path)
+        if cache_key not in self._views:
+            self._views[cache_key] = self._build_view(schema_id, path)
+        return self._views[cache_key]
+
+    def _build_view(self, schema_id: str, path: Optional[str]) -> Optional[SchemaSnapshot]:
+        schema = self._source.lookup(schema_id, True) if self._source else None
+        if schema is None:
+            return None
+        path = path or schema.get_path()
+        if not path:
+            log.debug("Relocatable schema %s needs a path", schema_id)
+            return None
+
+        if self._user_values is None:
+            settings = Gio.Settings.new_full(schema, None, path)
+            values = {key: settings.get_value(key) for key in schema.list_keys()}
+            user_keys = frozenset(
+                key for key in values if settings.get_user_value(key) is not None
+            )
+            return SchemaSnapshot(schema_id, MappingProxyType(values), user_keys)
+
+        values = {}
+        user_keys = set()
+        for key in schema.list_keys():
+            schema_key = schema.get_key(key)
+            value = self._user_values.get(path + key)
+            # Same acceptance rules GSettings applies to stored values
+            if (value is None
+                    or not value.is_of_type(schema_key.get_value_type())
+                    or not schema_key.range_check(value)):
+                value = schema_key.get_default_value()
+            else:
+                user_keys.add(key)
+            values[key] = value
+        return SchemaSnapshot(schema_id, MappingProxyType(values), frozenset(user_keys))
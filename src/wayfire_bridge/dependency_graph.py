@@ -0,0 +1,121 @@
+"""
+Dependency graph for derived Wayfire options
+Recomputes only the options an input change can affect
+"""
+
+from typing import Callable, Dict, Hashable, List, NamedTuple, Set, Tuple
+
+from .logging_config import get_logger
+from .mappings import DERIVED_OPTIONS
+
+log = get_logger(__name__)
+
+OptionKey = Tuple[str, str]
+
+
+class DerivedNode(NamedTuple):
+    """One DERIVED_OPTIONS entry with its compute function resolved."""
+    name: str
+    inputs: Tuple[Hashable, ...]
+    outputs: Tuple[OptionKey, ...]
+    compute: Callable[[], Dict[OptionKey, str]]
+
+
+class DependencyGraph:
+    """Maps each input to the derived options that read it.
+
+    invalidate(input) recomputes just the dependents of that input and
+    commits only the outputs whose value differs from what the graph last
+    committed, all inside one config transaction.
+    """
+
+    def __init__(self, config_manager):
+        self.config_manager = config_manager
+        self._nodes: Dict[str, DerivedNode] = {}
+        self._dependents: Dict[Hashable, List[str]] = {}
+        # (section, option) -> value as last committed by the graph
+        self._committed: Dict[OptionKey, str] = {}
+
+    @classmethod
+    def compile(cls, config_manager, provider, derived=DERIVED_OPTIONS) -> 'DependencyGraph':
+        """Build the graph from a DERIVED_OPTIONS-style table.
+
+        Compute names are looked up on provider once; entries whose compute
+        does not exist are logged and left out.
+        """
+        graph = cls(config_manager)
+        for name, spec in derived.items():
+            compute = getattr(provider, spec['compute'], None)
+            if not callable(compute):
+                log.warning("Unknown compute %r for derived option %s, skipping",
+                            spec['compute'], name)
+                continue
+            graph.add(name, spec['inputs'], spec['outputs'], compute)
+        return graph
+
+    def add(self, name: str, inputs, outputs, compute: Callable[[], Dict[OptionKey, str]]):
+        node = DerivedNode(name, tuple(tuple(i) for i in inputs),
+                           tuple(tuple(o) for o in outputs), compute)
+        self._nodes[name] = node
+        for input_id in node.inputs:
+            self._dependents.setdefault(input_id, []).append(name)
+
+    def inputs(self) -> List[Hashable]:
+        """Every input some derived option reads."""
+        return list(self._dependents)
+
+    def dependents(self, input_id: Hashable) -> List[str]:
+        """Names of the derived options that read input_id."""
+        return list(self._dependents.get(input_id, ()))
+
+    def remove_dependents(self, input_id: Hashable) -> List[str]:
+        """Drop every derived option that reads input_id (it is unavailable)."""
+        names = self.dependents(input_id)
+        for name in names:
+            node = self._nodes.pop(name)
+            for other in node.inputs:
+                self._dependents[other].remove(name)
+                if not self._dependents[other]:
+                    del self._dependents[other]
+        return names
+
+    def recompute_all(self) -> Set[OptionKey]:
+        """Compute every derived option, e.g. for the startup sync."""
+        return self._recompute(list(self._nodes))
+
+    def invalidate(self, *inputs: Hashable) -> Set[OptionKey]:
+        """Recompute the options that depend on inputs.
+
+        Returns the (section, option) keys whose value changed.
+        """
+        names: Dict[str, None] = {}
+        for input_id in inputs:
+            for name in self._dependents.get(input_id, ()):
+                names[name] = None
+        if not names:
+            return set()
+        log.debug("Inputs %s changed, recomputing %s", list(inputs), list(names))
+        return self._recompute(list(names))
+
+    def _recompute(self, names: List[str]) -> Set[OptionKey]:
+        changed: Set[OptionKey] = set()
+        with self.config_manager.transaction():
+            for name in names:
+                node = self._nodes[name]
+                try:
+                    values = node.compute()
+                except Exception:
+                    log.exception("Could not compute derived option %s", name)
+                    continue
+
+                for key in node.outputs:
+                    if key not in values:
+                        continue
+                    value = str(values[key])
+                    if self._committed.get(key) == value:
+                        continue
+                    self._committed[key] = value
+                    self.config_manager.set_value(key[0], key[1], value)
+                    changed.add(key)
+                    log.debug("Derived [%s] %s = %s (%s)", key[0], key[1], value, name)
+        return changed
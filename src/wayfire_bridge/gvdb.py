@@ -0,0 +1,82 @@
+"""
+GVDB reader for Wayfire Bridge
+Parses the hash table file format dconf keeps its databases in
+"""
+
+import struct
+from typing import Dict, List, Optional
+
+# GVDB layout (see gvdb-format.h in GLib/dconf)
+_GVDB_SIGNATURE = (0x72615647, 0x746e6169)  # "GVariant", little endian
+_HEADER = struct.Struct('<IIIIII')          # signature[2], version, options, root
+_HASH_HEADER = struct.Struct('<II')         # n_bloom_words, n_buckets
+_HASH_ITEM = struct.Struct('<IIIHccII')     # hash, parent, key_start, key_size,
+                                            # type, unused, value start/end
+_NO_PARENT = 0xffffffff
+_BLOOM_WORDS_MASK = (1 << 27) - 1
+
+
+class GvdbError(Exception):
+    """The file is not a GVDB database this reader understands."""
+
+
+def read_gvdb(data: bytes) -> Dict[str, bytes]:
+    """Return every value stored in a dconf GVDB file, keyed by full path.
+
+    Values are the serialized GVariant of type 'v' boxing the stored value,
+    exactly as they appear in the file. Only the root table is read, which
+    is where dconf keeps its keys; nested tables (.locks in system
+    databases) are ignored.
+    """
+    if len(data) < _HEADER.size:
+        raise GvdbError("file too short")
+    sig0, sig1, version, _options, root_start, root_end = _HEADER.unpack_from(data)
+    if (sig0, sig1) != _GVDB_SIGNATURE:
+        # Byteswapped databases come from foreign-endian hosts; not worth it
+        raise GvdbError("bad signature")
+    if version != 0:
+        raise GvdbError(f"unsupported version {version}")
+    if not (_HEADER.size <= root_start <= root_end <= len(data)):
+        raise GvdbError("root table out of bounds")
+    if root_end - root_start < _HASH_HEADER.size:
+        raise GvdbError("hash table out of bounds")
+
+    n_bloom_words, n_buckets = _HASH_HEADER.unpack_from(data, root_start)
+    n_bloom_words &= _BLOOM_WORDS_MASK
+    items_start = root_start + _HASH_HEADER.size + 4 * (n_bloom_words + n_buckets)
+    if items_start > root_end:
+        raise GvdbError("hash table out of bounds")
+    n_items = (root_end - items_start) // _HASH_ITEM.size
+
+    items = [
+        _HASH_ITEM.unpack_from(data, items_start + index * _HASH_ITEM.size)
+        for index in range(n_items)
+    ]
+
+    names: List[Optional[str]] = [None] * n_items
+
+    def full_name(index: int, depth: int = 0) -> str:
+        name = names[index]
+        if name is None:
+            if depth > n_items:
+                raise GvdbError("parent loop")
+            _, parent, key_start, key_size = items[index][:4]
+            if key_start + key_size > len(data):
+                raise GvdbError("key out of bounds")
+            name = data[key_start:key_start + key_size].decode('utf-8')
+            if parent != _NO_PARENT:
+                if parent >= n_items:
+                    raise GvdbError("parent out of bounds")
+                name = full_name(parent, depth + 1) + name
+            names[index] = name
+        return name
+
+    values: Dict[str, bytes] = {}
+    for index, item in enumerate(items):
+        item_type, start, end = item[4], item[6], item[7]
+        if item_type != b'v':
+            continue
+        if not (start <= end <= len(data)):
+            raise GvdbError("value out of bounds")
+        values[full_name(index)] = bytes(data[start:end])
+    return values
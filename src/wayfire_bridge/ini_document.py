@@ -0,0 +1,317 @@
+"""
+Format-preserving INI model for wayfire.ini
+Keeps comments, blank lines, continuation lines and ordering intact
+"""
+
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+# Indent used for continuation lines when the file gives no better hint
+DEFAULT_CONTINUATION_INDENT = '  '
+
+
+def _line_body(line: str) -> str:
+    """Return line without its line ending."""
+    return line.rstrip('\r\n')
+
+
+def _line_ending(line: str) -> str:
+    """Return the line ending of line ('' for a final unterminated line)."""
+    return line[len(_line_body(line)):]
+
+
+def _continues(line: str) -> bool:
+    """True if the physical line ends with a backslash continuation."""
+    return _line_body(line).rstrip().endswith('\\')
+
+
+def _is_comment(text: str) -> bool:
+    return text.startswith('#') or text.startswith(';')
+
+
+class _Entry:
+    """One option and the physical lines it occupies."""
+
+    __slots__ = ('section', 'option', 'lines')
+
+    def __init__(self, section: str, option: str, lines: List[str]):
+        self.section = section
+        self.option = option
+        # Physical lines including their line endings
+        self.lines = lines
+
+    def _logical(self) -> List[Tuple[int, str]]:
+        """(physical index, stripped text) for every value-bearing line."""
+        first = _line_body(self.lines[0])
+        logical = [(0, first.split('=', 1)[1].strip())]
+        for index, line in enumerate(self.lines[1:], start=1):
+            text = _line_body(line).strip()
+            if not _is_comment(text):
+                logical.append((index, text))
+        return logical
+
+    @property
+    def value(self) -> str:
+        # Same shape configparser produced: stripped lines joined with \n,
+        # comment lines inside the continuation dropped
+        return '\n'.join(text for _, text in self._logical())
+
+    def _indent(self) -> str:
+        for line in self.lines[1:]:
+            body = _line_body(line)
+            if body.strip():
+                return body[:len(body) - len(body.lstrip())]
+        return DEFAULT_CONTINUATION_INDENT
+
+    def set_value(self, value: str):
+        """Rewrite only the physical lines whose logical content changed."""
+        first = _line_body(self.lines[0])
+        key_part, after = first.split('=', 1)
+        spacing = after[:len(after) - len(after.lstrip())]
+        if not after.strip():
+            # 'key =' with no value yet: space it like the key side
+            spacing = key_part[len(key_part.rstrip()):]
+        prefix = key_part + '=' + spacing
+        indent = self._indent()
+        final_ending = _line_ending(self.lines[-1])
+
+        old = self._logical()
+        old_texts = [text for _, text in old]
+        new_texts = [text.strip() for text in value.split('\n')]
+
+        def render(position: int, text: str) -> str:
+            return (prefix if position == 0 else indent) + text + '\n'
+
+        # Comment lines are carried along with the logical line after them
+        comments_before: Dict[int, List[str]] = {}
+        previous = 0
+        for n, (index, _) in enumerate(old):
+            comments_before[n] = self.lines[previous + 1:index] if n else []
+            previous = index
+        trailing = self.lines[previous + 1:]
+
+        out: List[str] = []
+        matcher = SequenceMatcher(a=old_texts, b=new_texts, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                for i, j in zip(range(i1, i2), range(j1, j2)):
+                    out.extend(comments_before[i])
+                    if (i == 0) == (j == 0):
+                        out.append(self.lines[old[i][0]])
+                    else:
+                        out.append(render(j, new_texts[j]))
+            else:
+                for i in range(i1, i2):
+                    out.extend(comments_before[i])
+                for j in range(j1, j2):
+                    out.append(render(j, new_texts[j]))
+        out.extend(trailing)
+
+        # Every line but the last is terminated; the last keeps its ending
+        out = [line if _line_ending(line) else line + '\n' for line in out]
+        out[-1] = _line_body(out[-1]) + final_ending
+        self.lines = out
+
+
+class _Block:
+    """A section header (or the preamble) plus the lines that follow it."""
+
+    __slots__ = ('name', 'nodes', '_text')
+
+    def __init__(self, name: Optional[str]):
+        self.name = name
+        # Raw lines (str) and _Entry objects, in file order
+        self.nodes: list = []
+        self._text: Optional[str] = None
+
+    def invalidate(self):
+        self._text = None
+
+    def text(self) -> str:
+        if self._text is None:
+            parts = []
+            for node in self.nodes:
+                if isinstance(node, _Entry):
+                    parts.extend(node.lines)
+                else:
+                    parts.append(node)
+            self._text = ''.join(parts)
+        return self._text
+
+    def last_line_terminated(self) -> bool:
+        text = self.text()
+        return not text or text.endswith('\n')
+
+
+class IniDocument:
+    """Line-oriented INI document that round-trips byte for byte.
+
+    Unlike configparser, nothing is normalised on load: comments, blank
+    lines, continuation lines ending in a backslash and the original
+    ordering all survive. Changing an option patches only the lines that
+    option occupies, so serialization cost and on-disk diffs grow with the
+    number of changed options rather than with the file size.
+
+    Duplicate options follow configparser's strict=False rule: the last
+    occurrence wins, and setting the option collapses the duplicates.
+    """
+
+    def __init__(self, text: str = ''):
+        self._blocks: List[_Block] = []
+        self._sections: Dict[str, List[_Block]] = {}
+        self._entries: Dict[Tuple[str, str], List[_Entry]] = {}
+        self._parse(text)
+
+    # ------------------------------------------------------------------
+    # Parsing / serialization
+    # ------------------------------------------------------------------
+
+    def _parse(self, text: str):
+        block = _Block(None)
+        self._blocks.append(block)
+        entry = None
+
+        for line in text.splitlines(keepends=True):
+            if entry is not None:
+                # Inside a backslash continuation
+                entry.lines.append(line)
+                if not _continues(line):
+                    entry = None
+                continue
+
+            stripped = _line_body(line).strip()
+
+            if stripped.startswith('[') and ']' in stripped:
+                name = stripped[1:stripped.rindex(']')].strip()
+                block = _Block(name)
+                block.nodes.append(line)
+                self._blocks.append(block)
+                self._sections.setdefault(name, []).append(block)
+                continue
+
+            if block.name is not None and stripped and not _is_comment(stripped) and '=' in stripped:
+                option = stripped.split('=', 1)[0].strip()
+                entry = _Entry(block.name, option, [line])
+                block.nodes.append(entry)
+                self._entries.setdefault((block.name, option), []).append(entry)
+                if not _continues(line):
+                    entry = None
+                continue
+
+            block.nodes.append(line)
+
+    def serialize(self) -> str:
+        """Return the document text; untouched sections come from cache."""
+        return ''.join(block.text() for block in self._blocks)
+
+    # ------------------------------------------------------------------
+    # Sections
+    # ------------------------------------------------------------------
+
+    def has_section(self, section: str) -> bool:
+        return section in self._sections
+
+    def add_section(self, section: str):
+        """Append an empty [section] at the end of the document."""
+        if section in self._sections:
+            return
+
+        last = self._blocks[-1]
+        if not last.last_line_terminated():
+            self._terminate_last_line(last)
+        text = self.serialize()
+        if text and not text.endswith('\n\n'):
+            last.nodes.append('\n')
+            last.invalidate()
+
+        block = _Block(section)
+        block.nodes.append(f'[{section}]\n')
+        self._blocks.append(block)
+        self._sections[section] = [block]
+
+    # ------------------------------------------------------------------
+    # Options
+    # ------------------------------------------------------------------
+
+    def has_option(self, section: str, option: str) -> bool:
+        return (section, option) in self._entries
+
+    def get(self, section: str, option: str, default=None):
+        entries = self._entries.get((section, option))
+        if not entries:
+            return default
+        return entries[-1].value
+
+    def set(self, section: str, option: str, value: str):
+        """Set option, patching its existing lines or appending a new line."""
+        value = str(value)
+        entries = self._entries.get((section, option))
+
+        if entries:
+            # Collapse duplicates onto the occurrence that was winning
+            for stale in entries[:-1]:
+                self._detach(stale)
+            entry = entries[-1]
+            self._entries[(section, option)] = [entry]
+            if entry.value != value:
+                entry.set_value(value)
+                self._block_of(entry).invalidate()
+            return
+
+        if section not in self._sections:
+            self.add_section(section)
+
+        block = self._sections[section][-1]
+        entry = _Entry(section, option, [f'{option} = \n'])
+        entry.set_value(value)
+        if not entry.lines[-1].endswith('\n'):
+            entry.lines[-1] += '\n'
+
+        # New options go right after the section's last option, ahead of any
+        # blank lines or comments introducing the next section
+        position = 1
+        for index, node in enumerate(block.nodes):
+            if isinstance(node, _Entry):
+                position = index + 1
+        previous = block.nodes[position - 1]
+        if isinstance(previous, _Entry):
+            if not previous.lines[-1].endswith('\n'):
+                previous.lines[-1] += '\n'
+        elif not previous.endswith('\n'):
+            block.nodes[position - 1] = previous + '\n'
+
+        block.nodes.insert(position, entry)
+        block.invalidate()
+        self._entries[(section, option)] = [entry]
+
+    def remove(self, section: str, option: str) -> bool:
+        """Remove every occurrence of option; returns True if any existed."""
+        entries = self._entries.pop((section, option), None)
+        if not entries:
+            return False
+        for entry in entries:
+            self._detach(entry)
+        return True
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _block_of(self, entry: _Entry) -> _Block:
+        for block in self._sections[entry.section]:
+            if any(node is entry for node in block.nodes):
+                return block
+        raise KeyError(entry.option)
+
+    def _detach(self, entry: _Entry):
+        block = self._block_of(entry)
+        block.nodes = [node for node in block.nodes if node is not entry]
+        block.invalidate()
+
+    def _terminate_last_line(self, block: _Block):
+        node = block.nodes[-1]
+        if isinstance(node, _Entry):
+            node.lines[-1] += '\n'
+        else:
+            block.nodes[-1] = node + '\n'
+        block.invalidate()
@@ -0,0 +1,449 @@
+"""
+Wayfire IPC client for Wayfire Bridge
+Keeps a single non-blocking connection to the compositor's ipc plugin socket
+"""
+
+import fnmatch
+import glob
+import os
+import socket
+import stat
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import gi
+
+gi.require_version('GLib', '2.0')
+gi.require_version('Gio', '2.0')
+from gi.repository import GLib, Gio
+
+from .ipc_protocol import MessageReader, decode_message, encode_message
+from .logging_config import get_logger
+
+log = get_logger(__name__)
+
+# Reconnect backoff after failed connection attempts (seconds)
+_BACKOFF_INITIAL = 0.5
+_BACKOFF_MAX = 30.0
+
+# How long the compositor may take to answer before the connection is reset
+DEFAULT_TIMEOUT_MS = 2000
+
+# Sockets created by the Wayfire ipc plugin: wayfire-<display>.socket in /tmp
+# by default, or wherever _WAYFIRE_SOCKET points (the session puts it in
+# $XDG_RUNTIME_DIR, which a service with PrivateTmp can still see)
+_SOCKET_GLOB = 'wayfire-*.socket'
+# Let a freshly created socket start listening before it is used
+_APPEAR_DELAY_MS = 250
+
+# callback(response) - response is the decoded reply, or None if the request
+# never got one (no compositor, connection lost, timeout)
+ResponseCallback = Callable[[Optional[dict]], None]
+
+
+def _socket_dirs() -> List[str]:
+    dirs = []
+    for directory in (os.environ.get('XDG_RUNTIME_DIR'), '/tmp'):
+        if directory and directory not in dirs and os.path.isdir(directory):
+            dirs.append(directory)
+    return dirs
+
+
+def _socket_display(path: str) -> str:
+    """The WAYLAND_DISPLAY part of wayfire-<display>[-].socket."""
+    name = os.path.basename(path)
+    return name[len('wayfire-'):-len('.socket')].rstrip('-')
+
+
+def discover_socket() -> Optional[str]:
+    """Find the running compositor's IPC socket.
+
+    WAYFIRE_SOCKET wins if it points at a socket. Otherwise the runtime
+    directory and /tmp are scanned; a socket named after our
+    WAYLAND_DISPLAY is preferred, then the most recently created one.
+    """
+    env_path = os.environ.get('WAYFIRE_SOCKET')
+    if env_path:
+        try:
+            if stat.S_ISSOCK(os.stat(env_path).st_mode):
+                return env_path
+        except OSError:
+            pass
+
+    display = os.environ.get('WAYLAND_DISPLAY', '')
+    candidates = []
+    for directory in _socket_dirs():
+        for path in glob.glob(os.path.join(directory, _SOCKET_GLOB)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if stat.S_ISSOCK(st.st_mode):
+                candidates.append((bool(display) and _socket_display(path) == display,
+                                   st.st_mtime, path))
+
+    if not candidates:
+        return env_path
+    return max(candidates)[2]
+
+
+def _deliver_failure(callback: ResponseCallback):
+    callback(None)
+    return GLib.SOURCE_REMOVE
+
+
+class _Request:
+    __slots__ = ('method', 'callback', 'started')
+
+    def __init__(self, method: str, callback: Optional[ResponseCallback]):
+        self.method = method
+        self.callback = callback
+        self.started = time.monotonic()
+
+
+class WayfireIPCClient:
+    """Long-lived, non-blocking client for the Wayfire ipc plugin.
+
+    Requests are queued and written as the socket accepts them; responses
+    are read from a GLib IO watch and handed to each request's callback in
+    order. Nothing here ever blocks the main loop: a compositor that stops
+    answering only costs its own requests, which fail after timeout_ms.
+
+    The socket is opened lazily and reused for every call. When the
+    compositor goes away, pending requests fail and the next call
+    reconnects; failed connection attempts back off exponentially so a
+    missing compositor doesn't cost a connect() per option.
+
+    Without an explicit socket_path the socket is found with
+    discover_socket(), and watch_compositor() follows it across
+    compositor restarts.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout_ms: int = DEFAULT_TIMEOUT_MS):
+        self._socket_path = socket_path
+        self.timeout_ms = timeout_ms
+
+        self._sock: Optional[socket.socket] = None
+        self._reader = MessageReader()
+        self._outbuf = bytearray()
+        # Requests written (or queued) and still waiting for their response
+        self._pending = deque()
+
+        self._in_watch = 0
+        self._out_watch = 0
+        self._timeout_id = 0
+
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+        # Path of the live connection, and the socket directory watch
+        self._connected_path: Optional[str] = None
+        self._monitors: List[Gio.FileMonitor] = []
+        self._on_appeared: Optional[Callable[[], None]] = None
+        self._appeared_id = 0
+
+    @property
+    def socket_path(self) -> Optional[str]:
+        return self._socket_path or discover_socket()
+
+    def close(self):
+        """Drop the connection and any watch, failing anything in flight."""
+        for monitor in self._monitors:
+            monitor.cancel()
+        self._monitors = []
+        if self._appeared_id:
+            GLib.source_remove(self._appeared_id)
+            self._appeared_id = 0
+        self._disconnect()
+        self._fail_pending()
+
+    def watch_compositor(self, on_appeared: Callable[[], None]):
+        """Follow the compositor's socket appearing and disappearing.
+
+        When the socket we would connect to is (re)created, any connection
+        to the previous instance is dropped and on_appeared() runs once the
+        new one has had a moment to start listening. A removed socket drops
+        the connection straight away instead of waiting for a timeout.
+        """
+        self._on_appeared = on_appeared
+        if self._monitors:
+            return
+        for directory in _socket_dirs():
+            try:
+                monitor = Gio.File.new_for_path(directory).monitor_directory(
+                    Gio.FileMonitorFlags.NONE, None
+                )
+            except GLib.Error as e:
+                log.debug("Cannot watch %s for Wayfire sockets: %s", directory, e.message)
+                continue
+            monitor.connect('changed', self._on_socket_dir_changed)
+            self._monitors.append(monitor)
+            log.debug("Watching %s for Wayfire IPC sockets", directory)
+
+    # ------------------------------------------------------------------
+    # Public calls
+    # ------------------------------------------------------------------
+
+    def call(self, method: str, data: dict, callback: Optional[ResponseCallback] = None):
+        """Queue a request; callback receives the response on the main loop.
+
+        If the compositor is unreachable the callback is still invoked,
+        with None, from an idle handler rather than before call() returns.
+        """
+        if not self._ensure_connected():
+            if callback is not None:
+                GLib.idle_add(_deliver_failure, callback)
+            return
+
+        self._outbuf += encode_message(method, data)
+        self._pending.append(_Request(method, callback))
+        if not self._timeout_id:
+            self._timeout_id = GLib.timeout_add(self.timeout_ms, self._on_timeout)
+
+        self._write()
+
+    def set_options(self, options: Dict[Tuple[str, str], str],
+                    callback: Optional[Callable[[bool], None]] = None):
+        """Apply a whole change set with one wayfire/set-config-options call.
+
+        options maps (section, option) to its new string value. callback(ok)
+        reports whether the compositor accepted the batch; the round-trip
+        time is logged per batch.
+        """
+        if not options:
+            if callback is not None:
+                callback(True)
+            return
+
+        started = time.monotonic()
+        data = {f'{section}/{option}': value for (section, option), value in options.items()}
+
+        def done(response):
+            elapsed_ms = (time.monotonic() - started) * 1000
+            ok = response is not None and 'error' not in response
+            if response is not None and not ok:
+                log.warning("IPC set-config-options error: %s", response['error'])
+            elif ok:
+                log.info("IPC batch of %d option(s) applied in %.1fms", len(data), elapsed_ms)
+                log.debug("IPC batch: %s -> %s", data, response)
+            if callback is not None:
+                callback(ok)
+
+        self.call('wayfire/set-config-options', data, done)
+
+    def get_option(self, section: str, option: str,
+                   callback: Callable[[Optional[str]], None]):
+        """Read an option's live value; callback(None) if it can't be read."""
+        def done(response):
+            if response is None or 'error' in response:
+                if response is not None:
+                    log.debug("IPC get-config-option %s/%s: %s",
+                              section, option, response['error'])
+                callback(None)
+                return
+            value = response.get('value')
+            callback(None if value is None else str(value))
+
+        self.call('wayfire/get-config-option', {'option': f'{section}/{option}'}, done)
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    def _ensure_connected(self) -> bool:
+        if self._sock is not None:
+            return True
+
+        path = self.socket_path
+        if not path:
+            log.debug("No Wayfire IPC socket found, cannot send IPC")
+            return False
+
+        if time.monotonic() < self._retry_at:
+            log.debug("IPC reconnect backing off for %.1fs", self._retry_at - time.monotonic())
+            return False
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            # Local sockets either connect at once or fail at once
+            sock.connect(path)
+        except OSError as e:
+            sock.close()
+            log.debug("Could not connect to Wayfire IPC socket %s: %s", path, e)
+            self._schedule_retry()
+            return False
+
+        self._sock = sock
+        self._connected_path = path
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._in_watch = GLib.io_add_watch(
+            sock.fileno(), GLib.PRIORITY_DEFAULT,
+            GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+            self._on_readable,
+        )
+        log.debug("Connected to Wayfire IPC socket %s", path)
+        return True
+
+    def _schedule_retry(self):
+        self._backoff = min(_BACKOFF_MAX, self._backoff * 2 or _BACKOFF_INITIAL)
+        self._retry_at = time.monotonic() + self._backoff
+
+    def _disconnect(self):
+        for attr in ('_in_watch', '_out_watch', '_timeout_id'):
+            source_id = getattr(self, attr)
+            if source_id:
+                GLib.source_remove(source_id)
+                setattr(self, attr, 0)
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+        self._connected_path = None
+        self._reader.clear()
+        self._outbuf.clear()
+
+    def _fail_pending(self):
+        pending, self._pending = self._pending, deque()
+        # Always from an idle handler: a send() failing inside call() must
+        # not run callbacks while the caller is still queuing requests
+        for request in pending:
+            GLib.idle_add(self._fail_request, request)
+
+    def _fail_request(self, request: _Request):
+        self._complete(request, None)
+        return GLib.SOURCE_REMOVE
+
+    def _connection_lost(self, reason: str):
+        log.debug("Wayfire IPC connection lost: %s (%d request(s) failed)",
+                  reason, len(self._pending))
+        self._disconnect()
+        self._fail_pending()
+
+    def _on_socket_dir_changed(self, monitor, file, other_file, event_type):
+        path = file.get_path()
+        if not path or not fnmatch.fnmatch(os.path.basename(path), _SOCKET_GLOB):
+            return
+
+        if event_type == Gio.FileMonitorEvent.DELETED:
+            if self._sock is not None and path == self._connected_path:
+                self._connection_lost("socket removed")
+            return
+
+        if event_type != Gio.FileMonitorEvent.CREATED:
+            return
+        if self._socket_path and path != self._socket_path:
+            return
+        if self.socket_path != path:
+            log.debug("Ignoring Wayfire socket %s (not our compositor)", path)
+            return
+
+        log.info("Wayfire IPC socket appeared: %s", path)
+        if self._sock is not None:
+            self._connection_lost("compositor restarted")
+        # A new compositor deserves an immediate attempt
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+        if self._appeared_id:
+            GLib.source_remove(self._appeared_id)
+        self._appeared_id = GLib.timeout_add(_APPEAR_DELAY_MS, self._notify_appeared)
+
+    def _notify_appeared(self):
+        self._appeared_id = 0
+        if self._on_appeared is not None:
+            try:
+                self._on_appeared()
+            except Exception:
+                log.exception("Error handling new Wayfire compositor")
+        return GLib.SOURCE_REMOVE
+
+    # ------------------------------------------------------------------
+    # IO
+    # ------------------------------------------------------------------
+
+    def _write(self):
+        try:
+            while self._outbuf:
+                sent = self._sock.send(self._outbuf)
+                del self._outbuf[:sent]
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            self._connection_lost(str(e))
+            return
+
+        if self._outbuf and not self._out_watch:
+            self._out_watch = GLib.io_add_watch(
+                self._sock.fileno(), GLib.PRIORITY_DEFAULT,
+                GLib.IOCondition.OUT, self._on_writable,
+            )
+
+    def _on_writable(self, fd, condition):
+        self._out_watch = 0
+        if self._sock is not None:
+            self._write()
+        return GLib.SOURCE_REMOVE
+
+    def _on_readable(self, fd, condition):
+        payloads = []
+        try:
+            while True:
+                chunk = self._sock.recv(65536)
+                if not chunk:
+                    self._in_watch = 0
+                    self._connection_lost("closed by compositor")
+                    return GLib.SOURCE_REMOVE
+                payloads += self._reader.feed(chunk)
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            self._in_watch = 0
+            self._connection_lost(str(e))
+            return GLib.SOURCE_REMOVE
+
+        self._dispatch(payloads)
+        return GLib.SOURCE_CONTINUE
+
+    def _dispatch(self, payloads: List[bytes]):
+        """Hand every complete message received to its request."""
+        for payload in payloads:
+            if not self._pending:
+                log.debug("Dropping unsolicited IPC message")
+                continue
+            request = self._pending.popleft()
+            try:
+                response = decode_message(payload)
+            except ValueError:
+                log.warning("Malformed IPC response to %s", request.method)
+                response = None
+            self._complete(request, response)
+
+        # Restart the watchdog for whatever is still outstanding
+        if self._timeout_id:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = 0
+        if self._pending:
+            self._timeout_id = GLib.timeout_add(self.timeout_ms, self._on_timeout)
+
+    def _on_timeout(self):
+        self._timeout_id = 0
+        if self._pending:
+            log.warning("Wayfire did not answer %s within %dms, resetting IPC connection",
+                        self._pending[0].method, self.timeout_ms)
+            self._connection_lost("timeout")
+        return GLib.SOURCE_REMOVE
+
+    def _complete(self, request: _Request, response: Optional[dict]):
+        log.debug("IPC %s completed in %.1fms", request.method,
+                  (time.monotonic() - request.started) * 1000)
+        if request.callback is None:
+            return
+        try:
+            request.callback(response)
+        except Exception:
+            log.exception("Error in IPC callback for %s", request.method)
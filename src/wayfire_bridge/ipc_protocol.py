@@ -0,0 +1,50 @@
+"""
+Wayfire IPC wire format for Wayfire Bridge
+Length-prefixed JSON messages, framed and reassembled without any IO
+"""
+
+import json
+import struct
+from typing import List
+
+# Wire format: 4-byte little-endian length, then a UTF-8 JSON message
+_HEADER = struct.Struct('<I')
+
+
+def encode_message(method: str, data: dict) -> bytes:
+    """Frame one request for the ipc plugin socket."""
+    payload = json.dumps({'method': method, 'data': data}).encode('utf-8')
+    return _HEADER.pack(len(payload)) + payload
+
+
+def decode_message(payload: bytes) -> dict:
+    """Decode a payload returned by MessageReader; ValueError if malformed."""
+    return json.loads(payload.decode('utf-8'))
+
+
+class MessageReader:
+    """Reassembles messages from a byte stream that arrives in pieces.
+
+    A read from the socket may end anywhere: inside the length header,
+    inside a payload, or after several messages at once.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """Add received bytes; return the payloads they complete, in order."""
+        self._buffer += data
+        payloads = []
+        while len(self._buffer) >= _HEADER.size:
+            (length,) = _HEADER.unpack_from(self._buffer)
+            end = _HEADER.size + length
+            if len(self._buffer) < end:
+                break  # rest of this message is still in flight
+            payloads.append(bytes(self._buffer[_HEADER.size:end]))
+            del self._buffer[:end]
+        return payloads
+
+    def clear(self):
+        """Drop a partial message (the connection it came from is gone)."""
+        self._buffer.clear()
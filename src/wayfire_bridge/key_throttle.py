@@ -0,0 +1,89 @@
+"""
+Per-key change throttling for Wayfire Bridge
+Rate-limits bursts of changes to one setting, last value wins
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .logging_config import get_logger
+
+log = get_logger(__name__)
+
+# Return values of a timeout callback (GLib.SOURCE_REMOVE/SOURCE_CONTINUE)
+_SOURCE_REMOVE = False
+_SOURCE_CONTINUE = True
+
+
+class _Window:
+    __slots__ = ('source_id', 'pending', 'settle')
+
+    def __init__(self, settle: Callable[[], None]):
+        self.source_id = 0
+        self.pending: Optional[Callable[[], None]] = None
+        self.settle = settle
+
+
+class KeyThrottle:
+    """Applies a stream of changes to one key at most once per interval.
+
+    The first change of a burst is applied at once (leading edge) and opens
+    a window of interval_ms. Changes inside the window only replace the
+    pending apply, so whichever came last wins; it runs when the window
+    ends and opens the next one. Once a window ends with nothing pending
+    the burst is over and settle() runs, exactly once per burst.
+
+    Windows are timed with timeout_add(interval_ms, callback, key) and
+    source_remove(source_id), i.e. GLib.timeout_add and GLib.source_remove
+    on the main loop.
+
+        throttle = KeyThrottle(GLib.timeout_add, GLib.source_remove)
+        throttle.submit(('org.gnome.desktop.peripherals.mouse', 'speed'), 100,
+                        apply=preview_speed, settle=persist_speed)
+    """
+
+    def __init__(self, timeout_add: Callable[..., Any], source_remove: Callable[[Any], Any]):
+        self._timeout_add = timeout_add
+        self._source_remove = source_remove
+        self._windows: Dict[Hashable, _Window] = {}
+
+    def submit(self, key: Hashable, interval_ms: int,
+               apply: Callable[[], None], settle: Callable[[], None]):
+        window = self._windows.get(key)
+        if window is not None:
+            window.pending = apply
+            window.settle = settle
+            return
+
+        window = _Window(settle)
+        self._windows[key] = window
+        self._run(key, apply)
+        window.source_id = self._timeout_add(interval_ms, self._on_window_end, key)
+
+    def flush(self):
+        """End every open window now, running pending applies and settles."""
+        for key in list(self._windows):
+            window = self._windows.pop(key)
+            self._source_remove(window.source_id)
+            if window.pending is not None:
+                self._run(key, window.pending)
+            self._run(key, window.settle)
+
+    def _on_window_end(self, key):
+        window = self._windows[key]
+        if window.pending is None:
+            del self._windows[key]
+            log.debug("Throttle for %s settled", key)
+            self._run(key, window.settle)
+            return _SOURCE_REMOVE
+
+        apply, window.pending = window.pending, None
+        self._run(key, apply)
+        # Same interval again: the burst is still going
+        return _SOURCE_CONTINUE
+
+    @staticmethod
+    def _run(key, callback):
+        try:
+            callback()
+        except Exception:
+            log.exception("Throttled update of %s failed", key)
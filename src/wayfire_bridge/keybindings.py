@@ -9,6 +9,7 @@ import gi
 gi.require_version('Gio', '2.0')
 from gi.repository import Gio
 
+from .dconf_snapshot import arm_change_notifications
 from .logging_config import get_logger
 
 log = get_logger(__name__)
@@ -30,9 +31,20 @@ class CustomKeybindingsHandler:
         self.custom_keybindings: Dict[str, Dict] = {}
         # path -> Gio.Settings
         self.custom_keybinding_settings: Dict[str, Gio.Settings] = {}
-
-    def setup(self):
-        """Setup monitoring for custom keybindings"""
+        # SettingsSnapshot to read from while setup() applies startup values
+        self._snapshot = None
+        # False while setup() only connects watchers (startup sync skipped)
+        self._apply = True
+        # False for a one-shot sync: nothing would ever see a change
+        self._watch = True
+
+    def setup(self, snapshot=None, apply: bool = True, watch: bool = True):
+        """Setup monitoring for custom keybindings.
+
+        Initial values are read from snapshot (a SettingsSnapshot) if given;
+        with apply=False only the watchers are connected, with watch=False
+        only the values are applied.
+        """
         try:
             source = Gio.SettingsSchemaSource.get_default()
 
@@ -43,13 +55,25 @@ class CustomKeybindingsHandler:
             self.settings = Gio.Settings.new(self.schema)
 
             # Apply initial custom keybindings
-            self._sync_custom_keybindings(self.settings)
+            self._snapshot = snapshot
+            self._apply = apply
+            self._watch = watch
+            try:
+                values = snapshot.view(self.schema) if snapshot else None
+                self._sync_custom_keybindings(values or self.settings)
+            finally:
+                self._snapshot = None
+                self._apply = True
+
+            if not watch:
+                return
 
             # Monitor changes to the custom-keybindings list
             self.settings.connect(
                 'changed::custom-keybindings',
                 lambda s, k: self._sync_custom_keybindings(s),
             )
+            arm_change_notifications(self.settings, ['custom-keybindings'])
 
             log.info("Custom keybindings monitoring enabled")
 
@@ -63,20 +87,18 @@ class CustomKeybindingsHandler:
             current_paths = set(paths)
             previous_paths = set(self.custom_keybindings.keys())
 
-            # Remove deleted keybindings
-            for path in previous_paths - current_paths:
-                self._remove_custom_keybinding(path)
+            # The whole list is committed in one write
+            with self.config_manager.transaction():
+                # Remove deleted keybindings
+                for path in previous_paths - current_paths:
+                    self._remove_custom_keybinding(path)
 
-            # Add or update keybindings
-            for path in current_paths:
-                if path in previous_paths:
-                    self._update_custom_keybinding(path)
-                else:
-                    self._add_custom_keybinding(path)
-
-            if previous_paths or current_paths:
-                self.config_manager.save()
-                self.config_manager.reload_wayfire()
+                # Add or update keybindings
+                for path in current_paths:
+                    if path in previous_paths:
+                        self._update_custom_keybinding(path)
+                    else:
+                        self._add_custom_keybinding(path)
 
         except Exception:
             log.exception("Error syncing custom keybindings")
@@ -85,10 +107,11 @@ class CustomKeybindingsHandler:
         """Add a new custom keybinding"""
         try:
             settings = Gio.Settings.new_with_path(self.custom_schema, path)
+            values = self._snapshot.view(self.custom_schema, path) if self._snapshot else None
 
-            name = settings.get_string('name')
-            command = settings.get_string('command')
-            binding = settings.get_string('binding')
+            name = (values or settings).get_string('name')
+            command = (values or settings).get_string('command')
+            binding = (values or settings).get_string('binding')
 
             if not name or not command:
                 log.debug("Incomplete custom keybinding at %s (no name/command), skipping", path)
@@ -103,11 +126,14 @@ class CustomKeybindingsHandler:
             }
             self.custom_keybinding_settings[path] = settings
 
-            self._apply_custom_keybinding(path)
+            if self._apply:
+                self._apply_custom_keybinding(path)
 
-            settings.connect('changed::name',    lambda s, k, p=path: self._update_custom_keybinding(p))
-            settings.connect('changed::command', lambda s, k, p=path: self._update_custom_keybinding(p))
-            settings.connect('changed::binding', lambda s, k, p=path: self._update_custom_keybinding(p))
+            if self._watch:
+                settings.connect('changed::name',    lambda s, k, p=path: self._update_custom_keybinding(p))
+                settings.connect('changed::command', lambda s, k, p=path: self._update_custom_keybinding(p))
+                settings.connect('changed::binding', lambda s, k, p=path: self._update_custom_keybinding(p))
+                arm_change_notifications(settings, ['name', 'command', 'binding'])
 
             log.info("Added custom keybinding: %r -> %s", name, command)
 
@@ -143,7 +169,6 @@ class CustomKeybindingsHandler:
             self._apply_custom_keybinding(path)
 
             self.config_manager.save()
-            self.config_manager.reload_wayfire()
 
             log.info("Updated custom keybinding: %r -> %s", name, command)
 
@@ -0,0 +1,195 @@
+"""
+Keyboard state resolution for Wayfire Bridge
+Layout, variant and XKB options from GSettings, locale1 and /etc/default/keyboard
+"""
+
+from typing import Callable, Dict, NamedTuple, Optional
+
+import gi
+
+gi.require_version('Gio', '2.0')
+from gi.repository import Gio
+
+from .config_manager import read_key_value_file
+from .logging_config import get_logger
+from .transforms import format_keyboard_layout, normalize_xkb_options, parse_options_string
+
+log = get_logger(__name__)
+
+KEYBOARD_FILE = '/etc/default/keyboard'
+INPUT_SOURCES_SCHEMA = 'org.gnome.desktop.input-sources'
+
+# Monitor events that leave the file in a new state; CHANGED is followed
+# by CHANGES_DONE_HINT once the writer is finished
+_FILE_EVENTS = {
+    Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+    Gio.FileMonitorEvent.CREATED,
+    Gio.FileMonitorEvent.DELETED,
+    Gio.FileMonitorEvent.MOVED_IN,
+    Gio.FileMonitorEvent.MOVED_OUT,
+    Gio.FileMonitorEvent.RENAMED,
+}
+
+
+class KeyboardState(NamedTuple):
+    """The effective keyboard configuration."""
+    layout: str     # layouts with variants, e.g. 'us,de(nodeadkeys)'
+    layouts: str    # plain layouts, e.g. 'us,de'
+    variants: str   # variants matching layouts, e.g. ',nodeadkeys'
+    options: str    # merged XKB options, e.g. 'grp:alt_shift_toggle'
+    source: str     # where the layout came from: gsettings, locale1, file, default
+
+
+class KeyboardResolver:
+    """Resolves the keyboard state once per input generation.
+
+    Inputs, by priority: GSettings input-sources, locale1 and
+    /etc/default/keyboard. resolve() walks them once and memoizes the
+    result until invalidate() is called for a change to one of them.
+    GSettings and locale1 changes are reported by their owners; the
+    keyboard file is watched here and parsed only after it changed.
+    """
+
+    def __init__(self, reader: Callable[[str], object], locale1,
+                 on_file_changed: Optional[Callable[[], None]] = None,
+                 path: str = KEYBOARD_FILE):
+        # schema id -> settings reader (Gio.Settings or snapshot view) or None
+        self._reader = reader
+        self.locale1 = locale1
+        self.on_file_changed = on_file_changed
+        self.path = path
+        self.generation = 0
+        self._state: Optional[KeyboardState] = None
+        self._file: Optional[Dict[str, str]] = None
+        self._monitor: Optional[Gio.FileMonitor] = None
+
+    def watch(self):
+        """Start watching the keyboard file for changes."""
+        if self._monitor is not None:
+            return
+        try:
+            self._monitor = Gio.File.new_for_path(self.path).monitor_file(
+                Gio.FileMonitorFlags.NONE, None
+            )
+            self._monitor.connect('changed', self._on_file_event)
+        except Exception:
+            log.warning("Could not watch %s", self.path, exc_info=True)
+
+    def close(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+    def invalidate(self):
+        """Forget the resolved state; the next resolve() recomputes it."""
+        self._state = None
+        self.generation += 1
+
+    def resolve(self) -> KeyboardState:
+        if self._state is None:
+            layouts, variants, source = self._resolve_layout()
+            layout = format_keyboard_layout(layouts, variants) or layouts
+            options = self._resolve_options(layout)
+            self._state = KeyboardState(layout, layouts, variants, options, source)
+            log.debug("Keyboard state (generation %d): %s", self.generation, self._state)
+        return self._state
+
+    # ------------------------------------------------------------------
+    # Inputs
+    # ------------------------------------------------------------------
+
+    def _keyboard_file(self) -> Dict[str, str]:
+        if self._file is None:
+            self._file = read_key_value_file(self.path, strip_quotes=True)
+        return self._file
+
+    def _on_file_event(self, monitor, file, other_file, event):
+        if event not in _FILE_EVENTS:
+            return
+        log.debug("%s changed (%s)", self.path, event.value_nick)
+        self._file = None
+        self.invalidate()
+        if self.on_file_changed is not None:
+            try:
+                self.on_file_changed()
+            except Exception:
+                log.exception("Error handling %s change", self.path)
+
+    def _resolve_layout(self):
+        """(layouts, variants, source) with priority GSettings > locale1 > file > default"""
+        # 1. GSettings input-sources
+        settings = self._reader(INPUT_SOURCES_SCHEMA)
+        if settings:
+            layouts = []
+            variants = []
+            for source in settings.get_value('sources').unpack():
+                if len(source) >= 2 and source[0] == 'xkb':
+                    layout, _, variant = source[1].replace("'", "").partition('+')
+                    layouts.append(layout)
+                    variants.append(variant)
+            if layouts:
+                log.debug("Using keyboard layout from GSettings: %s", layouts)
+                return ','.join(layouts), ','.join(variants) if any(variants) else '', 'gsettings'
+
+        # 2. systemd-localed
+        props = self.locale1.get_all()
+        if props and props.get('X11Layout'):
+            log.debug("Using keyboard layout from locale1: %s", props['X11Layout'])
+            return str(props['X11Layout']), str(props.get('X11Variant', '')), 'locale1'
+
+        # 3. /etc/default/keyboard
+        keyboard_config = self._keyboard_file()
+        if keyboard_config.get('XKBLAYOUT'):
+            log.debug("Using keyboard layout from %s: %s", self.path, keyboard_config['XKBLAYOUT'])
+            return keyboard_config['XKBLAYOUT'], keyboard_config.get('XKBVARIANT', ''), 'file'
+
+        # 4. Default
+        log.debug("Using default keyboard layout: us")
+        return 'us', '', 'default'
+
+    def _resolve_options(self, layout: str) -> str:
+        """XKB options with priority: user GSettings > locale1 > /etc/default/keyboard > default"""
+        options_set = set()
+        gsettings_default = set()
+
+        # 1. GSettings (if user-modified)
+        settings = self._reader(INPUT_SOURCES_SCHEMA)
+        if settings:
+            try:
+                gsettings_options = settings.get_strv('xkb-options')
+                if settings.get_user_value('xkb-options') is not None:
+                    options_set = set(gsettings_options)
+                    log.debug("Using USER GSettings XKB options: %s", options_set)
+                else:
+                    gsettings_default = set(gsettings_options)
+                    log.debug("GSettings xkb-options not user-modified")
+            except Exception:
+                log.debug("Could not read GSettings xkb-options", exc_info=True)
+
+        # 2. systemd-localed
+        if not options_set:
+            props = self.locale1.get_all()
+            if props and 'X11Options' in props:
+                options_set = parse_options_string(str(props['X11Options']))
+                if options_set:
+                    log.debug("Got XKB options from locale1: %s", options_set)
+
+        # 3. /etc/default/keyboard
+        if not options_set:
+            options_set = parse_options_string(self._keyboard_file().get('XKBOPTIONS', ''))
+            if options_set:
+                log.debug("Got XKB options from %s: %s", self.path, options_set)
+
+        # 4. GSettings default (if nothing else found)
+        if not options_set and gsettings_default:
+            options_set = gsettings_default
+            log.debug("Using DEFAULT GSettings XKB options: %s", options_set)
+
+        options_set = normalize_xkb_options(options_set)
+
+        # Inject grp:alt_shift_toggle if multiple layouts and no grp: option
+        if ',' in layout and not any(opt.startswith('grp:') for opt in options_set):
+            options_set.add('grp:alt_shift_toggle')
+            log.debug("Injected grp:alt_shift_toggle for multiple layouts")
+
+        return ','.join(sorted(options_set))
@@ -0,0 +1,135 @@
+"""
+systemd-localed access for Wayfire Bridge
+org.freedesktop.locale1 properties through an asynchronous GDBus proxy
+"""
+
+from typing import Callable, Dict, List, Optional
+
+import gi
+
+gi.require_version('Gio', '2.0')
+gi.require_version('GLib', '2.0')
+from gi.repository import Gio, GLib
+
+from .logging_config import get_logger
+
+log = get_logger(__name__)
+
+LOCALE1_NAME = 'org.freedesktop.locale1'
+LOCALE1_PATH = '/org/freedesktop/locale1'
+
+
+class Locale1Properties:
+    """Cached org.freedesktop.locale1 properties.
+
+    The Gio.DBusProxy is built asynchronously: start() sends the request
+    and returns at once, so the system bus connection and the initial
+    GetAll overlap with other startup work. GDBus keeps its property cache
+    current from PropertiesChanged, re-reading invalidated properties
+    itself, so lookups never block on the bus.
+
+    on_changed(changed, invalidated) runs after every update of the cache,
+    including a proxy that only became ready after wait() gave up on it.
+    """
+
+    def __init__(self, on_changed: Optional[Callable[[Dict, List[str]], None]] = None,
+                 watch: bool = True):
+        self.on_changed = on_changed
+        # Without watch the properties are read once and never updated
+        self.watch = watch
+        self._proxy: Optional[Gio.DBusProxy] = None
+        self._pending = False
+        self._gave_up = False
+        # Unpacked copy of the proxy cache, dropped on every change
+        self._props: Optional[Dict] = None
+
+    def start(self):
+        """Begin connecting to locale1 without blocking."""
+        if self._pending or self._proxy is not None:
+            return
+        self._pending = True
+        flags = Gio.DBusProxyFlags.GET_INVALIDATED_PROPERTIES
+        if not self.watch:
+            flags |= Gio.DBusProxyFlags.DO_NOT_CONNECT_SIGNALS
+        Gio.DBusProxy.new_for_bus(
+            Gio.BusType.SYSTEM,
+            flags,
+            None,
+            LOCALE1_NAME,
+            LOCALE1_PATH,
+            LOCALE1_NAME,
+            None,
+            self._on_proxy_ready,
+        )
+
+    def wait(self, timeout_ms: int) -> bool:
+        """Block on the default main context until the proxy is ready.
+
+        Bounded by timeout_ms, so a slow or missing localed cannot hold up
+        startup. Any other source that becomes ready meanwhile is dispatched
+        as well, so call this before connecting handlers that should not
+        run yet. Returns True if the proxy is available.
+        """
+        if self._pending:
+            expired = False
+
+            def on_deadline():
+                nonlocal expired
+                expired = True
+                return GLib.SOURCE_REMOVE
+
+            deadline_id = GLib.timeout_add(timeout_ms, on_deadline)
+            context = GLib.MainContext.default()
+            while self._pending and not expired:
+                context.iteration(True)
+            if not expired:
+                GLib.source_remove(deadline_id)
+
+        if self._pending:
+            self._gave_up = True
+            log.info("locale1 not ready after %dms, continuing without it", timeout_ms)
+        return self._proxy is not None
+
+    def get_all(self) -> Optional[Dict]:
+        """All properties, or None if locale1 cannot be reached."""
+        if self._proxy is None:
+            return None
+        if self._props is None:
+            names = self._proxy.get_cached_property_names()
+            if not names:
+                # No owner on the bus (localed missing or failed to start)
+                return None
+            self._props = {
+                name: self._proxy.get_cached_property(name).unpack() for name in names
+            }
+        return self._props
+
+    def _on_proxy_ready(self, source, result):
+        self._pending = False
+        try:
+            self._proxy = Gio.DBusProxy.new_for_bus_finish(result)
+        except GLib.Error as e:
+            log.warning("Could not setup locale1 monitoring: %s", e.message)
+            return
+
+        if not self.watch:
+            return
+        self._proxy.connect('g-properties-changed', self._on_properties_changed)
+        log.info("locale1 monitoring enabled")
+
+        if self._gave_up:
+            # Startup went ahead without locale1; let it catch up now
+            self._gave_up = False
+            self._notify({}, [])
+
+    def _on_properties_changed(self, proxy, changed: GLib.Variant, invalidated: List[str]):
+        self._props = None
+        self._notify(changed.unpack(), list(invalidated))
+
+    def _notify(self, changed: Dict, invalidated: List[str]):
+        if self.on_changed is None:
+            return
+        try:
+            self.on_changed(changed, invalidated)
+        except Exception:
+            log.exception("Error handling locale1 property change")
@@ -1,8 +1,16 @@
 """
 Mappings from gsettings to Wayfire configuration
 Format: (schema, key): {'section': ..., 'option': ..., 'transform': ...}
+Optional 'throttle_ms': apply at most one change per interval (sliders)
 """
 
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+from .logging_config import get_logger
+
+log = get_logger(__name__)
+
 GSETTINGS_MAPPINGS = {
     # ==========================================================================
     # Desktop Interface Settings
@@ -296,7 +304,7 @@ GSETTINGS_MAPPINGS = {
     # switch-input-source and switch-input-source-backward are intentionally
     # NOT mapped. Wayfire has no keybinding mechanism for switching layouts.
     # Layout switching is handled entirely via xkb_options grp:* toggle options,
-    # which are written to [input] xkb_options by get_merged_xkb_options().
+    # which are written to [input] xkb_options by KeyboardResolver.resolve().
     # The grp: option is auto-injected when multiple layouts are present.
 
     # ==========================================================================
@@ -315,7 +323,8 @@ GSETTINGS_MAPPINGS = {
     ('org.gnome.desktop.peripherals.mouse', 'speed'): {
         'section': 'input',
         'option': 'mouse_cursor_speed',
-        'transform': 'float'
+        'transform': 'float',
+        'throttle_ms': 100,
     },
     ('org.gnome.desktop.peripherals.mouse', 'left-handed'): {
         'section': 'input',
@@ -366,22 +375,14 @@ GSETTINGS_MAPPINGS = {
         'option': 'tap_to_click',
         'transform': 'bool'
     },
-    ('org.gnome.desktop.peripherals.touchpad', 'two-finger-scrolling-enabled'): {
-        'section': 'input',
-        'option': 'scroll_method',
-        'transform': 'scroll_method'
-    },
+    # two-finger-scrolling-enabled: see DERIVED_OPTIONS['scroll_method']
     ('org.gnome.desktop.peripherals.touchpad', 'speed'): {
         'section': 'input',
         'option': 'touchpad_cursor_speed',
-        'transform': 'float'
-    },
-    # Note: left-handed for touchpad handled specially due to 'mouse' option
-    ('org.gnome.desktop.peripherals.touchpad', 'left-handed'): {
-        'section': 'input',
-        'option': 'touchpad_left_handed_mode',
-        'transform': 'touchpad_left_handed'  # Special transform
+        'transform': 'float',
+        'throttle_ms': 100,
     },
+    # left-handed: see DERIVED_OPTIONS['touchpad_left_handed_mode']
     ('org.gnome.desktop.peripherals.touchpad', 'disable-while-typing'): {
         'section': 'input',
         'option': 'disable_while_typing',
@@ -404,12 +405,14 @@ GSETTINGS_MAPPINGS = {
     ('org.gnome.desktop.peripherals.keyboard', 'delay'): {
         'section': 'input',
         'option': 'kb_repeat_delay',
-        'transform': 'int'
+        'transform': 'int',
+        'throttle_ms': 100,
     },
     ('org.gnome.desktop.peripherals.keyboard', 'repeat-interval'): {
         'section': 'input',
         'option': 'kb_repeat_rate',
-        'transform': 'kb_repeat_rate'
+        'transform': 'kb_repeat_rate',
+        'throttle_ms': 100,
     },
     ('org.gnome.desktop.peripherals.keyboard', 'numlock-state'): {
         'section': 'input',
@@ -417,22 +420,8 @@ GSETTINGS_MAPPINGS = {
         'transform': 'bool'
     },
 
-    # ==========================================================================
-    # Input Sources (Keyboard Layout)
-    # These are written to BOTH wayfire.ini AND environment file
-    # wayfire.ini: Direct config for Wayfire to use
-    # environment: For XWayland and other apps
-    # ==========================================================================
-    ('org.gnome.desktop.input-sources', 'sources'): {
-        'section': 'input',
-        'option': 'xkb_layout',
-        'transform': 'xkb_layout'
-    },
-    ('org.gnome.desktop.input-sources', 'xkb-options'): {
-        'section': 'input',
-        'option': 'xkb_options',
-        'transform': 'xkb_options'
-    },
+    # Input Sources (Keyboard Layout): see DERIVED_OPTIONS['xkb_layout'] and
+    # DERIVED_OPTIONS['xkb_options']
 
     # ==========================================================================
     # Display Settings (Night Light)
@@ -449,3 +438,122 @@ GSETTINGS_MAPPINGS = {
     },
 
 }
+
+
+# Options derived from more than one input.
+# Inputs: ('gsettings', schema, key), ('locale1',) or ('file', path).
+# 'compute' names a WayfireBridge method returning {(section, option): value}
+# for the declared outputs; it runs again whenever one of its inputs changes.
+_TOUCHPAD = 'org.gnome.desktop.peripherals.touchpad'
+_INPUT_SOURCES = 'org.gnome.desktop.input-sources'
+_KEYBOARD_FILE = ('file', '/etc/default/keyboard')
+
+DERIVED_OPTIONS = {
+    'scroll_method': {
+        'inputs': [
+            ('gsettings', _TOUCHPAD, 'two-finger-scrolling-enabled'),
+            ('gsettings', _TOUCHPAD, 'edge-scrolling-enabled'),
+        ],
+        'outputs': [('input', 'scroll_method')],
+        'compute': 'derive_scroll_method',
+    },
+    # 'mouse' makes the touchpad follow the mouse setting
+    'touchpad_left_handed_mode': {
+        'inputs': [
+            ('gsettings', _TOUCHPAD, 'left-handed'),
+            ('gsettings', 'org.gnome.desktop.peripherals.mouse', 'left-handed'),
+        ],
+        'outputs': [('input', 'touchpad_left_handed_mode')],
+        'compute': 'derive_touchpad_left_handed',
+    },
+    # These are written to BOTH wayfire.ini AND environment file
+    # wayfire.ini: pushed live over IPC, Wayfire rebuilds the keymap
+    # environment: For XWayland and the next login
+    'xkb_layout': {
+        'inputs': [
+            ('gsettings', _INPUT_SOURCES, 'sources'),
+            ('locale1',),
+            _KEYBOARD_FILE,
+        ],
+        'outputs': [('input', 'xkb_layout'), ('input', 'xkb_variant')],
+        'compute': 'derive_xkb_layout',
+    },
+    # grp:alt_shift_toggle is injected when there is more than one layout
+    'xkb_options': {
+        'inputs': [
+            ('gsettings', _INPUT_SOURCES, 'xkb-options'),
+            ('gsettings', _INPUT_SOURCES, 'sources'),
+            ('locale1',),
+            _KEYBOARD_FILE,
+        ],
+        'outputs': [('input', 'xkb_options')],
+        'compute': 'derive_xkb_options',
+    },
+    # Aero-snap needs both the move and the grid switch
+    'edge_tiling': {
+        'inputs': [('gsettings', 'com.solus-project.budgie-wm', 'edge-tiling')],
+        'outputs': [('move', 'enable_snap'), ('grid', 'mouse_snap')],
+        'compute': 'derive_edge_tiling',
+    },
+}
+
+
+# ------------------------------------------------------------------
+# Compiled dispatch table
+# ------------------------------------------------------------------
+
+class CompiledMapping(NamedTuple):
+    """One GSETTINGS_MAPPINGS entry with its transform resolved."""
+    schema: str
+    key: str
+    section: str
+    option: str
+    transform: Callable[[Any], Any]
+    # Minimum interval between applied changes; 0 applies every change
+    throttle_ms: int = 0
+    # Keybinding sharing its target with other keys; see merge_groups()
+    merge: bool = False
+
+
+def compile_mappings(transforms, mappings=GSETTINGS_MAPPINGS) -> Dict[str, Dict[str, CompiledMapping]]:
+    """Compile the mapping table into {schema: {key: CompiledMapping}}.
+
+    Done once at startup, so a change notification is a plain dict lookup
+    instead of a transform lookup by name. Entries whose transform does
+    not exist are logged and left out.
+    """
+    # Keybinding targets with several source keys get their bindings merged
+    binding_sources = Counter(
+        (mapping['section'], mapping['option'])
+        for mapping in mappings.values() if mapping.get('transform') == 'keybinding'
+    )
+
+    table: Dict[str, Dict[str, CompiledMapping]] = {}
+    for (schema, key), mapping in mappings.items():
+        transform_name = mapping.get('transform', 'str')
+        transform = getattr(transforms, transform_name, None)
+        if not callable(transform):
+            log.warning("Unknown transform %r for %s::%s, skipping", transform_name, schema, key)
+            continue
+        target = (mapping['section'], mapping['option'])
+        table.setdefault(schema, {})[key] = CompiledMapping(
+            schema, key, mapping['section'], mapping['option'], transform,
+            mapping.get('throttle_ms', 0),
+            transform_name == 'keybinding' and binding_sources[target] > 1,
+        )
+    return table
+
+
+def merge_groups(table: Dict[str, Dict[str, CompiledMapping]]
+                 ) -> Dict[Tuple[str, str], List[CompiledMapping]]:
+    """Group the merged keybinding mappings by (section, option).
+
+    Sources keep their GSETTINGS_MAPPINGS order, which is the order their
+    bindings appear in the merged value.
+    """
+    groups: Dict[Tuple[str, str], List[CompiledMapping]] = {}
+    for keys in table.values():
+        for mapping in keys.values():
+            if mapping.merge:
+                groups.setdefault((mapping.section, mapping.option), []).append(mapping)
+    return groups
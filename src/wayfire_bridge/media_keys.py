@@ -8,6 +8,7 @@ import gi
 gi.require_version('Gio', '2.0')
 from gi.repository import Gio
 
+from .dconf_snapshot import arm_change_notifications
 from .logging_config import get_logger
 
 log = get_logger(__name__)
@@ -218,9 +219,16 @@ class MediaKeysHandler:
         self.transforms = transforms
         self.schema = 'org.buddiesofbudgie.settings-daemon.plugins.media-keys'
         self.settings = None
+        # SchemaSnapshot to read from while setup() applies startup values
+        self._values = None
 
-    def setup(self):
-        """Setup monitoring for media keys"""
+    def setup(self, snapshot=None, apply: bool = True, watch: bool = True):
+        """Setup monitoring for media keys.
+
+        Initial values are read from snapshot (a SettingsSnapshot) if given;
+        with apply=False only the watchers are connected, with watch=False
+        only the values are applied.
+        """
         try:
             source = Gio.SettingsSchemaSource.get_default()
             if not source.lookup(self.schema, True):
@@ -228,21 +236,30 @@ class MediaKeysHandler:
                 return
 
             self.settings = Gio.Settings.new(self.schema)
+            self._values = snapshot.view(self.schema) if snapshot else None
 
-            for key, mapping in MEDIA_KEY_MAPPINGS.items():
-                try:
-                    self._apply_media_key(key, mapping)
-                    self.settings.connect(
-                        f'changed::{key}',
-                        lambda s, k, m=mapping, gk=key: self._on_media_key_changed(gk, m),
-                    )
-                except Exception:
-                    log.exception("Error setting up media key %s", key)
+            with self.config_manager.transaction():
+                for key, mapping in MEDIA_KEY_MAPPINGS.items():
+                    try:
+                        if apply:
+                            self._apply_media_key(key, mapping)
+                        if not watch:
+                            continue
+                        self.settings.connect(
+                            f'changed::{key}',
+                            lambda s, k, m=mapping, gk=key: self._on_media_key_changed(gk, m),
+                        )
+                    except Exception:
+                        log.exception("Error setting up media key %s", key)
+                if watch:
+                    arm_change_notifications(self.settings, MEDIA_KEY_MAPPINGS)
 
             log.info("Media keys monitoring enabled (%d keys)", len(MEDIA_KEY_MAPPINGS))
 
         except Exception:
             log.exception("Error setting up media keys")
+        finally:
+            self._values = None
 
     def _apply_media_key(self, gsettings_key: str, mapping: dict):
         """Apply a media key binding"""
@@ -251,7 +268,7 @@ class MediaKeysHandler:
                 return
 
             try:
-                value = self.settings.get_value(gsettings_key).unpack()
+                value = (self._values or self.settings).get_value(gsettings_key).unpack()
             except Exception:
                 log.debug("Could not read media key %s (key may not exist in schema)", gsettings_key)
                 return
@@ -321,7 +338,7 @@ class MediaKeysHandler:
                 schema_obj = self.settings.get_property('settings-schema')
                 if schema_obj and schema_obj.has_key(static_key):
                     try:
-                        static_value = self.settings.get_value(static_key).unpack()
+                        static_value = (self._values or self.settings).get_value(static_key).unpack()
                         if isinstance(static_value, list):
                             keybindings = [k for k in static_value if k and k not in ('', 'disabled')]
                             if keybindings:
@@ -346,4 +363,3 @@ class MediaKeysHandler:
         log.debug("Media key changed: %s", key)
         self._apply_media_key(key, mapping)
         self.config_manager.save()
-        self.config_manager.reload_wayfire()
@@ -0,0 +1,78 @@
+"""
+Session environment propagation for Wayfire Bridge
+Hands changed variables to the systemd user manager and the D-Bus activation environment
+"""
+
+from typing import Dict, Iterable, Optional
+
+import gi
+
+gi.require_version('Gio', '2.0')
+gi.require_version('GLib', '2.0')
+from gi.repository import Gio, GLib
+
+from .logging_config import get_logger
+
+log = get_logger(__name__)
+
+
+class SessionEnvironment:
+    """Updates the environment apps launched from now on are started with.
+
+    Each update is one UnsetAndSetEnvironment call to the systemd user
+    manager and one UpdateActivationEnvironment call to the session bus,
+    both asynchronous. The activation environment has no way to unset a
+    variable, so removals only reach systemd.
+    """
+
+    def __init__(self):
+        self._bus: Optional[Gio.DBusConnection] = None
+
+    def update(self, changed: Dict[str, str], unset: Iterable[str] = ()):
+        unset = sorted(unset)
+        if not changed and not unset:
+            return
+
+        bus = self._get_bus()
+        if bus is None:
+            return
+
+        log.info("Updating session environment: %s",
+                 ', '.join(sorted(changed) + [f'-{name}' for name in unset]))
+
+        assignments = [f'{name}={value}' for name, value in sorted(changed.items())]
+        bus.call(
+            'org.freedesktop.systemd1',
+            '/org/freedesktop/systemd1',
+            'org.freedesktop.systemd1.Manager',
+            'UnsetAndSetEnvironment',
+            GLib.Variant('(asas)', (unset, assignments)),
+            None, Gio.DBusCallFlags.NONE, -1, None,
+            self._on_call_done, 'systemd user manager',
+        )
+        if changed:
+            bus.call(
+                'org.freedesktop.DBus',
+                '/org/freedesktop/DBus',
+                'org.freedesktop.DBus',
+                'UpdateActivationEnvironment',
+                GLib.Variant('(a{ss})', (dict(changed),)),
+                None, Gio.DBusCallFlags.NONE, -1, None,
+                self._on_call_done, 'D-Bus activation environment',
+            )
+
+    def _get_bus(self) -> Optional[Gio.DBusConnection]:
+        if self._bus is None:
+            try:
+                # The shared connection GSettings already opened
+                self._bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+            except GLib.Error as e:
+                log.warning("No session bus, not updating session environment: %s", e.message)
+        return self._bus
+
+    @staticmethod
+    def _on_call_done(bus, result, target):
+        try:
+            bus.call_finish(result)
+        except GLib.Error as e:
+            log.warning("Could not update %s: %s", target, e.message)
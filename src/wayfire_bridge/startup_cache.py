@@ -0,0 +1,120 @@
+"""
+Startup fingerprint cache for Wayfire Bridge
+Lets a login with unchanged settings skip the startup sync
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .config_manager import atomic_write_text
+from .logging_config import get_logger
+
+log = get_logger(__name__)
+
+# Bump when the cache file layout changes
+_CACHE_FORMAT = 1
+
+
+def _file_digest(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def code_version() -> str:
+    """Stamp of the installed bridge modules (mapping tables, transforms).
+
+    A package upgrade that changes how settings are translated must not
+    be mistaken for an unchanged login.
+    """
+    digest = hashlib.sha256()
+    for module in sorted(Path(__file__).parent.glob('*.py')):
+        st = module.stat()
+        digest.update(f'{module.name}:{st.st_size}:{st.st_mtime_ns}'.encode())
+    return digest.hexdigest()
+
+
+def fingerprint(inputs: dict) -> str:
+    """Digest of a JSON-serialisable description of the startup inputs."""
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def startup_fingerprint(gsettings: str, locale1: Optional[Mapping],
+                        keyboard_mtime: Optional[int], environ: Mapping[str, str]) -> str:
+    """Digest of everything a startup sync reads.
+
+    LANG and LC_* from the environment only count when locale1 supplies no
+    Locale, the one case the environment file falls back to them. The
+    --sync-once run and the user service are started with different
+    environments, and must still agree on an unchanged login.
+    """
+    inputs = {
+        'gsettings': gsettings,
+        'locale1': locale1,
+        'keyboard': keyboard_mtime,
+        'code': code_version(),
+    }
+    if not any('=' in entry for entry in (locale1 or {}).get('Locale', ())):
+        inputs['environ'] = {
+            k: v for k, v in environ.items() if k == 'LANG' or k.startswith('LC_')
+        }
+    return fingerprint(inputs)
+
+
+class StartupCache:
+    """Remembers the inputs and outputs of the last completed startup sync.
+
+    Stored as JSON next to wayfire.ini, the one directory the sandboxed
+    service may write: the input fingerprint, a digest of every file the
+    sync wrote and the options it manages. A startup is redundant only if inputs and outputs still match,
+    so editing wayfire.ini by hand (or losing it) forces a full sync again.
+    """
+
+    FILENAME = '.wayfire-bridge-startup.json'
+
+    def __init__(self, config_dir: Path):
+        self.path = Path(config_dir) / self.FILENAME
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            log.debug("Ignoring unreadable startup cache %s", self.path, exc_info=True)
+            return {}
+        if not isinstance(data, dict) or data.get('format') != _CACHE_FORMAT:
+            return {}
+        return data
+
+    def is_fresh(self, inputs_fingerprint: str, outputs: Dict[str, Path]) -> bool:
+        """True if the last sync had these inputs and its outputs are intact."""
+        data = self._load()
+        if data.get('fingerprint') != inputs_fingerprint:
+            return False
+        stored = data.get('outputs', {})
+        if set(stored) != set(outputs):
+            return False
+        return all(stored[name] == _file_digest(path) for name, path in outputs.items())
+
+    def managed_options(self) -> List[Tuple[str, str]]:
+        """Options the last completed sync managed, for reconciling without it."""
+        return [tuple(key) for key in self._load().get('managed', []) if len(key) == 2]
+
+    def store(self, inputs_fingerprint: str, outputs: Dict[str, Path],
+              managed: List[Tuple[str, str]]):
+        data = {
+            'format': _CACHE_FORMAT,
+            'fingerprint': inputs_fingerprint,
+            'outputs': {name: _file_digest(path) for name, path in outputs.items()},
+            'managed': [list(key) for key in managed],
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.path, json.dumps(data, indent=1) + '\n')
+        except OSError:
+            log.warning("Could not write startup cache %s", self.path, exc_info=True)
@@ -0,0 +1,44 @@
+"""
+Startup phase timing for Wayfire Bridge
+Reports how long each step of the startup pipeline took
+"""
+
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from .logging_config import get_logger
+
+log = get_logger(__name__)
+
+
+class StartupTimer:
+    """Collects wall time per named phase and logs a one-line summary.
+
+        timer = StartupTimer()
+        with timer.phase('snapshot'):
+            ...
+        timer.report()
+    """
+
+    def __init__(self):
+        self._started = time.monotonic()
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            self.phases.append((name, elapsed_ms))
+            log.debug("Startup phase %s took %.1fms", name, elapsed_ms)
+
+    @property
+    def total_ms(self) -> float:
+        return (time.monotonic() - self._started) * 1000
+
+    def report(self):
+        summary = ', '.join(f'{name} {elapsed:.1f}ms' for name, elapsed in self.phases)
+        log.info("Startup took %.1fms (%s)", self.total_ms, summary)
@@ -0,0 +1,137 @@
+"""
+Coalescing write scheduler for Wayfire Bridge
+Turns bursts of config saves into a single wayfire.ini write
+"""
+
+import os
+import time
+
+import gi
+
+gi.require_version('GLib', '2.0')
+from gi.repository import GLib
+
+from .logging_config import get_logger
+
+log = get_logger(__name__)
+
+# Quiet period after the last change before the config is written
+DEFAULT_DEBOUNCE_MS = 200
+# Upper bound on how long a change may wait while changes keep arriving
+DEFAULT_MAX_LATENCY_MS = 1000
+# Same pair for idle writes: changes already applied live over IPC, where
+# the file only needs to catch up once things have settled
+DEFAULT_IDLE_DEBOUNCE_MS = 3000
+DEFAULT_IDLE_MAX_LATENCY_MS = 15000
+
+
+def _env_ms(name: str, default: int) -> int:
+    """Read a millisecond value from the environment, falling back to default."""
+    raw = os.environ.get(name, '').strip()
+    if not raw:
+        return default
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        log.warning("Ignoring invalid %s=%r, using %dms", name, raw, default)
+        return default
+
+
+class WriteScheduler:
+    """Coalesces save requests into one flush on the GLib main loop.
+
+    mark_dirty() (re)arms a debounce timer. The flush callback runs once
+    changes have been quiet for debounce_ms, or at the latest max_latency_ms
+    after the first unflushed change, whichever comes first.
+
+    mark_dirty(idle=True) uses the longer idle_debounce_ms/idle_max_latency_ms
+    pair instead. A regular change arriving while an idle write is pending
+    pulls the deadline forward again.
+    """
+
+    def __init__(self, flush_callback, debounce_ms: int = DEFAULT_DEBOUNCE_MS,
+                 max_latency_ms: int = DEFAULT_MAX_LATENCY_MS,
+                 idle_debounce_ms: int = DEFAULT_IDLE_DEBOUNCE_MS,
+                 idle_max_latency_ms: int = DEFAULT_IDLE_MAX_LATENCY_MS):
+        self.flush_callback = flush_callback
+        self.debounce_ms = debounce_ms
+        self.max_latency_ms = max(max_latency_ms, debounce_ms)
+        self.idle_debounce_ms = idle_debounce_ms
+        self.idle_max_latency_ms = max(idle_max_latency_ms, idle_debounce_ms)
+
+        self._debounce_id = 0
+        self._deadline_id = 0
+        self._deadline_at = 0.0
+        self._pending = False
+
+    @classmethod
+    def from_environment(cls, flush_callback):
+        """Create a scheduler honouring WAYFIRE_BRIDGE_WRITE_* overrides."""
+        return cls(
+            flush_callback,
+            debounce_ms=_env_ms('WAYFIRE_BRIDGE_WRITE_DEBOUNCE_MS', DEFAULT_DEBOUNCE_MS),
+            max_latency_ms=_env_ms('WAYFIRE_BRIDGE_WRITE_MAX_LATENCY_MS', DEFAULT_MAX_LATENCY_MS),
+            idle_debounce_ms=_env_ms('WAYFIRE_BRIDGE_IDLE_WRITE_DEBOUNCE_MS',
+                                     DEFAULT_IDLE_DEBOUNCE_MS),
+            idle_max_latency_ms=_env_ms('WAYFIRE_BRIDGE_IDLE_WRITE_MAX_LATENCY_MS',
+                                        DEFAULT_IDLE_MAX_LATENCY_MS),
+        )
+
+    @property
+    def pending(self) -> bool:
+        """True while a flush is scheduled but has not run yet."""
+        return self._pending
+
+    def mark_dirty(self, idle: bool = False):
+        """Record that the config changed and (re)start the quiet window.
+
+        idle=True marks a change that is already live in the compositor, so
+        the write can wait for the longer idle window.
+        """
+        self._pending = True
+        debounce_ms = self.idle_debounce_ms if idle else self.debounce_ms
+        max_latency_ms = self.idle_max_latency_ms if idle else self.max_latency_ms
+
+        if self._debounce_id:
+            GLib.source_remove(self._debounce_id)
+        self._debounce_id = GLib.timeout_add(debounce_ms, self._on_debounce)
+
+        # The deadline is armed by the first change only, so a steady stream
+        # of changes cannot postpone the write indefinitely; it only moves
+        # when a more urgent change needs an earlier one
+        deadline_at = time.monotonic() + max_latency_ms / 1000
+        if self._deadline_id and deadline_at < self._deadline_at:
+            GLib.source_remove(self._deadline_id)
+            self._deadline_id = 0
+        if not self._deadline_id:
+            self._deadline_id = GLib.timeout_add(max_latency_ms, self._on_deadline)
+            self._deadline_at = deadline_at
+
+    def cancel(self):
+        """Drop any scheduled flush (the caller is about to write itself)."""
+        if self._debounce_id:
+            GLib.source_remove(self._debounce_id)
+            self._debounce_id = 0
+        if self._deadline_id:
+            GLib.source_remove(self._deadline_id)
+            self._deadline_id = 0
+        self._pending = False
+
+    def _on_debounce(self):
+        self._debounce_id = 0
+        log.debug("Write scheduler: quiet window elapsed, flushing")
+        self._fire()
+        return GLib.SOURCE_REMOVE
+
+    def _on_deadline(self):
+        self._deadline_id = 0
+        log.debug("Write scheduler: max latency reached, flushing")
+        self._fire()
+        return GLib.SOURCE_REMOVE
+
+    def _fire(self):
+        self.cancel()
+        try:
+            self.flush_callback()
+        except Exception:
+            log.exception("Scheduled config flush failed")
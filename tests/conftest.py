@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The package is installed by meson, not pip; import it from the tree
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
@@ -0,0 +1,38 @@
+import os
+
+from wayfire_bridge.config_manager import atomic_write_text
+
+
+def test_replaces_content_and_keeps_mode(tmp_path):
+    path = tmp_path / 'wayfire.ini'
+    path.write_text('old\n')
+    path.chmod(0o600)
+    atomic_write_text(path, 'new\n')
+    assert path.read_text() == 'new\n'
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert os.listdir(tmp_path) == ['wayfire.ini']
+
+
+def test_creates_missing_directories(tmp_path):
+    path = tmp_path / 'budgie-desktop' / 'wayfire' / 'wayfire.ini'
+    atomic_write_text(path, '[core]\n')
+    assert path.read_text() == '[core]\n'
+
+
+def test_writes_through_symlink(tmp_path):
+    dotfiles = tmp_path / 'dotfiles'
+    dotfiles.mkdir()
+    target = dotfiles / 'wayfire.ini'
+    target.write_text('old\n')
+    config = tmp_path / 'config'
+    config.mkdir()
+    link = config / 'wayfire.ini'
+    link.symlink_to(target)
+
+    atomic_write_text(link, 'new\n')
+
+    assert link.is_symlink()
+    assert target.read_text() == 'new\n'
+    # The temp file lives next to the real file, not the link
+    assert os.listdir(config) == ['wayfire.ini']
+    assert os.listdir(dotfiles) == ['wayfire.ini']
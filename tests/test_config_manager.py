@@ -0,0 +1,336 @@
+from wayfire_bridge.config_manager import ConfigManager
+
+INI = (
+    "[core]\n"
+    "plugins = ipc ipc-rules\n"
+    "\n"
+    "[autostart]\n"
+    "desktop = budgie-desktop\n"
+    "\n"
+    "[input]\n"
+    "xkb_layout = us\n"
+)
+
+
+class FakeScheduler:
+    """Stands in for WriteScheduler: records requests, flushes on demand."""
+
+    def __init__(self, flush_callback):
+        self.flush_callback = flush_callback
+        self.marks = []
+        self.pending = False
+
+    def mark_dirty(self, idle=False):
+        self.marks.append(idle)
+        self.pending = True
+
+    def cancel(self):
+        self.pending = False
+
+    def fire(self):
+        self.cancel()
+        self.flush_callback()
+
+
+def make_manager(tmp_path, text=INI, scheduler=False):
+    path = tmp_path / 'wayfire.ini'
+    path.write_text(text)
+    manager = ConfigManager(path)
+    if scheduler:
+        manager.scheduler = FakeScheduler(manager.flush)
+    return manager
+
+
+# WriteScheduler coalescing
+
+def test_save_without_scheduler_writes_at_once(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.save()
+    assert manager.writes_performed == 1
+    assert 'xkb_layout = de\n' in manager.config_path.read_text()
+
+
+def test_saves_coalesce_into_one_write(tmp_path):
+    manager = make_manager(tmp_path, scheduler=True)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.save()
+    manager.set_value('input', 'xkb_options', 'grp:alt_shift_toggle')
+    manager.save()
+
+    assert manager.scheduler.marks == [False, False]
+    assert manager.writes_performed == 0
+    assert manager.config_path.read_text() == INI
+
+    manager.scheduler.fire()
+    assert manager.writes_performed == 1
+    text = manager.config_path.read_text()
+    assert 'xkb_layout = de\n' in text
+    assert 'xkb_options = grp:alt_shift_toggle\n' in text
+
+
+def test_save_with_nothing_changed_schedules_nothing(tmp_path):
+    manager = make_manager(tmp_path, scheduler=True)
+    manager.save()
+    assert manager.scheduler.marks == []
+
+
+def test_flush_pending_writes_only_when_scheduled(tmp_path):
+    manager = make_manager(tmp_path, scheduler=True)
+    manager.flush_pending()
+    assert manager.writes_performed == 0 and manager.writes_skipped == 0
+
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.save()
+    manager.flush_pending()
+    assert manager.writes_performed == 1
+    assert not manager.scheduler.pending
+
+
+# Digest skip
+
+def test_unchanged_content_skips_the_write(tmp_path):
+    manager = make_manager(tmp_path)
+    inode = manager.config_path.stat().st_ino
+    manager.flush()
+    assert manager.writes_performed == 0
+    assert manager.writes_skipped == 1
+    assert manager.config_path.stat().st_ino == inode
+
+
+def test_rewrite_of_last_written_content_is_skipped(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.flush()
+    assert manager.writes_performed == 1
+
+    # The journal is clear after a write, so force a second flush
+    manager.flush()
+    assert manager.writes_performed == 1
+    assert manager.writes_skipped == 1
+
+
+def test_value_restored_between_flushes_skips_the_write(tmp_path):
+    manager = make_manager(tmp_path, scheduler=True)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.save()
+    manager.set_value('input', 'xkb_layout', 'us')
+    manager.scheduler.fire()
+    assert manager.writes_performed == 0
+    assert manager.writes_skipped == 1
+    assert not manager.has_pending_changes()
+
+
+# Change journal
+
+def test_journal_records_the_exact_delta(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.set_value('input', 'xkb_options', 'grp:alt_shift_toggle')
+    manager.remove_option('autostart', 'desktop')
+    assert [tuple(change) for change in manager.pending_changes()] == [
+        ('input', 'xkb_layout', 'us', 'de'),
+        ('input', 'xkb_options', None, 'grp:alt_shift_toggle'),
+        ('autostart', 'desktop', 'budgie-desktop', None),
+    ]
+
+
+def test_journal_keeps_the_value_from_before_the_first_change(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.set_value('input', 'xkb_layout', 'fr')
+    assert [tuple(change) for change in manager.pending_changes()] == [
+        ('input', 'xkb_layout', 'us', 'fr'),
+    ]
+
+
+def test_change_and_change_back_leaves_nothing_pending(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.set_value('input', 'xkb_layout', 'us')
+    assert not manager.has_pending_changes()
+
+    manager.set_value('input', 'xkb_options', 'grp:alt_shift_toggle')
+    manager.remove_option('input', 'xkb_options')
+    assert not manager.has_pending_changes()
+
+
+def test_setting_the_current_value_is_not_a_change(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.set_value('input', 'xkb_layout', 'us')
+    assert not manager.has_pending_changes()
+
+
+def test_flush_clears_the_journal(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.flush()
+    assert manager.pending_changes() == []
+
+
+# Transactions
+
+def test_nested_transactions_write_once_at_the_outermost_exit(tmp_path):
+    manager = make_manager(tmp_path)
+    with manager.transaction():
+        manager.set_value('input', 'xkb_layout', 'de')
+        with manager.transaction():
+            manager.set_value('input', 'xkb_options', 'grp:alt_shift_toggle')
+            manager.save()
+        manager.save()
+        assert manager.writes_performed == 0
+    assert manager.writes_performed == 1
+    assert not manager.has_pending_changes()
+
+
+def test_transaction_schedules_one_save(tmp_path):
+    manager = make_manager(tmp_path, scheduler=True)
+    with manager.transaction():
+        with manager.transaction():
+            manager.set_value('input', 'xkb_layout', 'de')
+            manager.save()
+        manager.set_value('input', 'xkb_options', 'grp:alt_shift_toggle')
+        manager.save()
+        assert manager.scheduler.marks == []
+    assert manager.scheduler.marks == [False]
+
+
+def test_flush_inside_transaction_is_deferred_and_not_debounced(tmp_path):
+    manager = make_manager(tmp_path, scheduler=True)
+    with manager.transaction():
+        manager.set_value('input', 'xkb_layout', 'de')
+        manager.flush()
+        assert manager.writes_performed == 0
+    assert manager.writes_performed == 1
+    assert manager.scheduler.marks == []
+
+
+def test_transaction_commits_when_the_body_raises(tmp_path):
+    manager = make_manager(tmp_path)
+    try:
+        with manager.transaction():
+            manager.set_value('input', 'xkb_layout', 'de')
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert manager.writes_performed == 1
+
+
+def test_empty_transaction_writes_nothing(tmp_path):
+    manager = make_manager(tmp_path)
+    with manager.transaction():
+        pass
+    assert manager.writes_performed == 0 and manager.writes_skipped == 0
+
+
+# Live apply
+
+class FakeIPC:
+    """Answers like Wayfire: a batch with any unknown key is rejected whole."""
+
+    def __init__(self, live, invalid=()):
+        self.live = dict(live)
+        self.invalid = set(invalid)
+        self.batches = []
+        self.reads = []
+
+    def set_options(self, options, callback=None):
+        self.batches.append(dict(options))
+        ok = all(key in self.live and value not in self.invalid
+                 for key, value in options.items())
+        if ok:
+            self.live.update(options)
+        if callback is not None:
+            callback(ok)
+
+    def get_option(self, section, option, callback):
+        self.reads.append((section, option))
+        callback(self.live.get((section, option)))
+
+
+LIVE = {
+    ('core', 'plugins'): 'ipc ipc-rules',
+    ('input', 'xkb_layout'): 'us',
+    ('input', 'xkb_options'): '',
+}
+
+
+def make_live_manager(tmp_path, live=LIVE, invalid=()):
+    manager = make_manager(tmp_path, scheduler=True)
+    manager.ipc = FakeIPC(live, invalid)
+    manager.live_apply = True
+    return manager
+
+
+def test_unknown_key_does_not_sink_the_others(tmp_path):
+    manager = make_live_manager(tmp_path)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.set_value('command', 'binding_terminal', '<super> KEY_T')
+    manager.save()
+
+    assert manager.ipc.batches == [{('input', 'xkb_layout'): 'de'}]
+    assert manager.ipc.live[('input', 'xkb_layout')] == 'de'
+    # The rejected key waits for the file, not the idle window
+    assert False in manager.scheduler.marks
+
+    manager.scheduler.fire()
+    assert 'binding_terminal = <super> KEY_T\n' in manager.config_path.read_text()
+
+
+def test_rejected_key_is_not_offered_again_before_the_file_write(tmp_path):
+    manager = make_live_manager(tmp_path)
+    manager.set_value('command', 'binding_terminal', '<super> KEY_T')
+    manager.save()
+    manager.ipc.reads.clear()
+
+    manager.set_value('input', 'xkb_options', 'grp:alt_shift_toggle')
+    manager.save()
+    assert manager.ipc.reads == [('input', 'xkb_options')]
+    assert manager.ipc.batches == [{('input', 'xkb_options'): 'grp:alt_shift_toggle'}]
+
+
+def test_confirmed_keys_go_out_as_one_batch_without_reading_back(tmp_path):
+    manager = make_live_manager(tmp_path)
+    manager.live_mirror.update({
+        ('input', 'xkb_layout'): 'us',
+        ('input', 'xkb_options'): '',
+    })
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.set_value('input', 'xkb_options', 'grp:alt_shift_toggle')
+    manager.save()
+
+    assert manager.ipc.reads == []
+    assert manager.ipc.batches == [{
+        ('input', 'xkb_layout'): 'de',
+        ('input', 'xkb_options'): 'grp:alt_shift_toggle',
+    }]
+    assert manager.scheduler.marks == [True]
+
+
+def test_rejected_batch_is_retried_per_option(tmp_path):
+    manager = make_live_manager(tmp_path, invalid={'bogus'})
+    manager.live_mirror.update({
+        ('input', 'xkb_layout'): 'us',
+        ('input', 'xkb_options'): '',
+    })
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.set_value('input', 'xkb_options', 'bogus')
+    manager.save()
+
+    assert manager.ipc.batches[1:] == [
+        {('input', 'xkb_layout'): 'de'},
+        {('input', 'xkb_options'): 'bogus'},
+    ]
+    assert manager.ipc.live[('input', 'xkb_layout')] == 'de'
+    assert False in manager.scheduler.marks
+
+
+def test_push_live_sends_only_known_keys(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.ipc = FakeIPC(LIVE)
+    manager.set_value('input', 'xkb_layout', 'de')
+    manager.set_value('input', 'xkb_variant', 'nodeadkeys')
+    manager.push_live([('input', 'xkb_layout'), ('input', 'xkb_variant')])
+
+    assert manager.ipc.batches == [{('input', 'xkb_layout'): 'de'}]
+    assert manager.writes_performed == 0
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import pytest
+
+gi = pytest.importorskip('gi')
+gi.require_version('GLib', '2.0')
+from gi.repository import GLib  # noqa: E402
+
+from wayfire_bridge.dconf_snapshot import _read_user_values  # noqa: E402
+
+DATABASE = (Path(__file__).resolve().parent / 'data' / 'dconf-user.gvdb').read_bytes()
+
+
+def test_user_values_are_unboxed():
+    values = _read_user_values(DATABASE)
+    expected = {
+        '/org/gnome/desktop/interface/cursor-size': GLib.Variant('i', 32),
+        '/org/gnome/desktop/interface/gtk-theme': GLib.Variant('s', 'Yaru-dark'),
+        '/org/gnome/desktop/input-sources/sources':
+            GLib.Variant('a(ss)', [('xkb', 'us'), ('xkb', 'de+nodeadkeys')]),
+        '/org/gnome/desktop/wm/keybindings/close': GLib.Variant('as', ['<Alt>F4']),
+        '/com/solus-project/budgie-wm/button-style': GLib.Variant('s', 'left'),
+        '/org/gnome/desktop/peripherals/touchpad/tap-to-click': GLib.Variant('b', True),
+    }
+    assert values.keys() == expected.keys()
+    for name, value in expected.items():
+        assert values[name].equal(value)
@@ -0,0 +1,101 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+from wayfire_bridge.gvdb import GvdbError, read_gvdb
+
+# A user database in dconf's layout: an 'L' item per directory, every item
+# named relative to its parent, values boxed as 'v'
+DATABASE = (Path(__file__).resolve().parent / 'data' / 'dconf-user.gvdb').read_bytes()
+
+# Serialized 'v' GVariants as stored in the file
+EXPECTED = {
+    '/org/gnome/desktop/interface/cursor-size': b' \x00\x00\x00\x00i',
+    '/org/gnome/desktop/interface/gtk-theme': b'Yaru-dark\x00\x00s',
+    '/org/gnome/desktop/input-sources/sources':
+        b'xkb\x00us\x00\x04xkb\x00de+nodeadkeys\x00\x04\x08\x1b\x00a(ss)',
+    '/org/gnome/desktop/wm/keybindings/close': b'<Alt>F4\x00\x08\x00as',
+    '/com/solus-project/budgie-wm/button-style': b'left\x00\x00s',
+    '/org/gnome/desktop/peripherals/touchpad/tap-to-click': b'\x01\x00b',
+}
+
+HEADER = struct.Struct('<IIIIII')
+ITEM = struct.Struct('<IIIHccII')
+
+
+def patched_header(**fields):
+    names = ('sig0', 'sig1', 'version', 'options', 'root_start', 'root_end')
+    header = dict(zip(names, HEADER.unpack_from(DATABASE)))
+    header.update(fields)
+    return HEADER.pack(*(header[name] for name in names)) + DATABASE[HEADER.size:]
+
+
+def items_start():
+    _, _, _, _, root_start, _ = HEADER.unpack_from(DATABASE)
+    n_bloom_words, n_buckets = struct.unpack_from('<II', DATABASE, root_start)
+    return root_start + 8 + 4 * (n_bloom_words + n_buckets)
+
+
+def patched_item(index, **fields):
+    names = ('hash', 'parent', 'key_start', 'key_size', 'type', 'unused',
+             'value_start', 'value_end')
+    offset = items_start() + index * ITEM.size
+    item = dict(zip(names, ITEM.unpack_from(DATABASE, offset)))
+    item.update(fields)
+    packed = ITEM.pack(*(item[name] for name in names))
+    return DATABASE[:offset] + packed + DATABASE[offset + ITEM.size:]
+
+
+def first_value_item():
+    _, _, _, _, _, root_end = HEADER.unpack_from(DATABASE)
+    for index in range((root_end - items_start()) // ITEM.size):
+        if ITEM.unpack_from(DATABASE, items_start() + index * ITEM.size)[4] == b'v':
+            return index
+    raise AssertionError("no value item")
+
+
+def test_values_by_full_path():
+    assert read_gvdb(DATABASE) == EXPECTED
+
+
+def test_directories_are_not_values():
+    assert not any(name.endswith('/') for name in read_gvdb(DATABASE))
+
+
+@pytest.mark.parametrize('data, message', [
+    (DATABASE[:HEADER.size - 1], 'too short'),
+    (b'\0' * HEADER.size, 'bad signature'),
+    (patched_header(sig0=0x47566172, sig1=0x69616e74), 'bad signature'),
+    (patched_header(version=1), 'unsupported version'),
+    (patched_header(root_start=8), 'root table out of bounds'),
+    (patched_header(root_end=len(DATABASE) + 1), 'root table out of bounds'),
+    (patched_header(root_end=HEADER.size + 4), 'hash table out of bounds'),
+])
+def test_rejects_bad_header(data, message):
+    with pytest.raises(GvdbError, match=message):
+        read_gvdb(data)
+
+
+def test_rejects_value_out_of_bounds():
+    data = patched_item(first_value_item(), value_end=len(DATABASE) + 1)
+    with pytest.raises(GvdbError, match='value out of bounds'):
+        read_gvdb(data)
+
+
+def test_rejects_key_out_of_bounds():
+    data = patched_item(first_value_item(), key_start=len(DATABASE))
+    with pytest.raises(GvdbError, match='key out of bounds'):
+        read_gvdb(data)
+
+
+def test_rejects_parent_out_of_bounds():
+    data = patched_item(first_value_item(), parent=0x7fff)
+    with pytest.raises(GvdbError, match='parent out of bounds'):
+        read_gvdb(data)
+
+
+def test_rejects_parent_loop():
+    index = first_value_item()
+    with pytest.raises(GvdbError, match='parent loop'):
+        read_gvdb(patched_item(index, parent=index))
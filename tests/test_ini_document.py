@@ -0,0 +1,76 @@
+from pathlib import Path
+
+from wayfire_bridge.ini_document import IniDocument
+
+WAYFIRE_INI = Path(__file__).resolve().parent.parent / 'src' / 'wayfire.ini'
+
+CONTINUED = (
+    "[core]\n"
+    "plugins = alpha \\\n"
+    "  beta \\\n"
+    "  gamma\n"
+    "xwayland = true\n"
+)
+
+
+def test_shipped_config_round_trips():
+    text = WAYFIRE_INI.read_text()
+    assert IniDocument(text).serialize() == text
+
+
+def test_continuation_lines_round_trip():
+    doc = IniDocument(CONTINUED)
+    assert doc.serialize() == CONTINUED
+    assert doc.get('core', 'plugins') == 'alpha \\\nbeta \\\ngamma'
+    assert doc.get('core', 'xwayland') == 'true'
+
+
+def test_set_after_continued_option():
+    doc = IniDocument(CONTINUED)
+    doc.set('core', 'xwayland', 'false')
+    assert doc.serialize() == CONTINUED.replace('xwayland = true', 'xwayland = false')
+
+
+def test_missing_final_newline_round_trips():
+    text = "[input]\nxkb_layout = us"
+    assert IniDocument(text).serialize() == text
+
+
+def test_set_existing_option_keeps_missing_final_newline():
+    doc = IniDocument("[input]\nxkb_layout = us")
+    doc.set('input', 'xkb_layout', 'de')
+    assert doc.serialize() == "[input]\nxkb_layout = de"
+
+
+def test_append_to_section_without_final_newline():
+    doc = IniDocument("[input]\nxkb_layout = us")
+    doc.set('input', 'xkb_options', 'grp:alt_shift_toggle')
+    assert doc.serialize() == "[input]\nxkb_layout = us\nxkb_options = grp:alt_shift_toggle\n"
+
+
+def test_append_to_existing_section_goes_after_its_last_option():
+    doc = IniDocument("[input]\nxkb_layout = us\n\n# Output\n[output]\nmode = auto\n")
+    doc.set('input', 'xkb_variant', 'nodeadkeys')
+    assert doc.serialize() == (
+        "[input]\nxkb_layout = us\nxkb_variant = nodeadkeys\n\n# Output\n[output]\nmode = auto\n"
+    )
+
+
+def test_append_to_new_section():
+    doc = IniDocument("[core]\nxwayland = true\n")
+    doc.set('input', 'xkb_layout', 'us')
+    assert doc.has_section('input')
+    assert doc.serialize() == "[core]\nxwayland = true\n\n[input]\nxkb_layout = us\n"
+
+
+def test_append_to_new_section_without_final_newline():
+    doc = IniDocument("[core]\nxwayland = true")
+    doc.set('input', 'xkb_layout', 'us')
+    assert doc.serialize() == "[core]\nxwayland = true\n\n[input]\nxkb_layout = us\n"
+
+
+def test_unchanged_value_leaves_text_alone():
+    text = "[input]\nxkb_layout=us\n"
+    doc = IniDocument(text)
+    doc.set('input', 'xkb_layout', 'us')
+    assert doc.serialize() == text
@@ -0,0 +1,81 @@
+import json
+import struct
+
+import pytest
+
+from wayfire_bridge.ipc_protocol import MessageReader, decode_message, encode_message
+
+
+def frame(message):
+    payload = json.dumps(message).encode('utf-8')
+    return struct.pack('<I', len(payload)) + payload
+
+
+def test_encode_is_little_endian_length_then_json():
+    data = encode_message('wayfire/get-config-option', {'option': 'core/focus_mode'})
+    (length,) = struct.unpack_from('<I', data)
+    assert length == len(data) - 4
+    assert json.loads(data[4:]) == {
+        'method': 'wayfire/get-config-option',
+        'data': {'option': 'core/focus_mode'},
+    }
+
+
+def test_encode_counts_bytes_not_characters():
+    data = encode_message('wayfire/set-config-options', {'input/xkb_layout': 'ü'})
+    assert struct.unpack_from('<I', data)[0] == len(data) - 4
+
+
+def test_reader_returns_a_whole_message():
+    reader = MessageReader()
+    payloads = reader.feed(frame({'result': 'ok'}))
+    assert [decode_message(payload) for payload in payloads] == [{'result': 'ok'}]
+
+
+def test_reader_reassembles_byte_by_byte():
+    reader = MessageReader()
+    data = frame({'result': 'ok', 'value': 'click'})
+    payloads = []
+    for index in range(len(data)):
+        payloads += reader.feed(data[index:index + 1])
+        if index < len(data) - 1:
+            assert payloads == []
+    assert [decode_message(payload) for payload in payloads] == [
+        {'result': 'ok', 'value': 'click'}
+    ]
+
+
+def test_reader_splits_several_messages_in_one_read():
+    reader = MessageReader()
+    first = frame({'result': 'ok'})
+    second = frame({'error': 'no such option'})
+    third = frame({'result': 'ok', 'value': 3})
+    stream = first + second + third
+
+    # Two whole messages and the header of the third
+    payloads = reader.feed(stream[:len(first) + len(second) + 2])
+    assert [decode_message(payload) for payload in payloads] == [
+        {'result': 'ok'}, {'error': 'no such option'},
+    ]
+    payloads = reader.feed(stream[len(first) + len(second) + 2:])
+    assert [decode_message(payload) for payload in payloads] == [{'result': 'ok', 'value': 3}]
+
+
+def test_reader_handles_an_empty_payload():
+    reader = MessageReader()
+    assert reader.feed(struct.pack('<I', 0)) == [b'']
+
+
+def test_clear_drops_a_partial_message():
+    reader = MessageReader()
+    data = frame({'result': 'ok'})
+    assert reader.feed(data[:5]) == []
+    reader.clear()
+    assert [decode_message(payload) for payload in reader.feed(data)] == [{'result': 'ok'}]
+
+
+def test_decode_rejects_malformed_payloads():
+    with pytest.raises(ValueError):
+        decode_message(b'{"result": ')
+    with pytest.raises(ValueError):
+        decode_message(b'\xff\xfe')
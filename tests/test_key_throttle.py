@@ -0,0 +1,112 @@
+from wayfire_bridge.key_throttle import KeyThrottle
+
+KEY = ('org.gnome.desktop.peripherals.mouse', 'speed')
+
+
+class FakeTimer:
+    """timeout_add/source_remove stand-ins; windows end when fired."""
+
+    def __init__(self):
+        self.sources = {}
+        self.next_id = 1
+
+    def timeout_add(self, interval_ms, callback, *args):
+        source_id = self.next_id
+        self.next_id += 1
+        self.sources[source_id] = (interval_ms, callback, args)
+        return source_id
+
+    def source_remove(self, source_id):
+        del self.sources[source_id]
+
+    def fire(self):
+        """Run every source once, like their interval elapsing."""
+        for source_id, (_, callback, args) in list(self.sources.items()):
+            if not callback(*args):
+                del self.sources[source_id]
+
+
+def make_throttle():
+    timer = FakeTimer()
+    return KeyThrottle(timer.timeout_add, timer.source_remove), timer
+
+
+def submit(throttle, events, value, key=KEY):
+    throttle.submit(key, 100,
+                    apply=lambda: events.append(('apply', value)),
+                    settle=lambda: events.append(('settle', value)))
+
+
+def test_first_change_applies_at_once():
+    throttle, timer = make_throttle()
+    events = []
+    submit(throttle, events, 1)
+    assert events == [('apply', 1)]
+    assert [interval for interval, _, _ in timer.sources.values()] == [100]
+
+
+def test_last_change_in_a_window_wins():
+    throttle, timer = make_throttle()
+    events = []
+    for value in (1, 2, 3, 4):
+        submit(throttle, events, value)
+    assert events == [('apply', 1)]
+
+    timer.fire()
+    assert events == [('apply', 1), ('apply', 4)]
+
+
+def test_burst_settles_once_after_a_quiet_window():
+    throttle, timer = make_throttle()
+    events = []
+    submit(throttle, events, 1)
+    submit(throttle, events, 2)
+    timer.fire()  # applies 2, window stays open
+    assert timer.sources
+    timer.fire()  # nothing pending: settle
+    assert events == [('apply', 1), ('apply', 2), ('settle', 2)]
+    assert not timer.sources
+
+    timer.fire()
+    assert events[-1] == ('settle', 2)
+
+
+def test_single_change_settles_after_its_window():
+    throttle, timer = make_throttle()
+    events = []
+    submit(throttle, events, 1)
+    timer.fire()
+    assert events == [('apply', 1), ('settle', 1)]
+
+
+def test_keys_are_throttled_independently():
+    throttle, timer = make_throttle()
+    events = []
+    submit(throttle, events, 'a1', key='a')
+    submit(throttle, events, 'b1', key='b')
+    submit(throttle, events, 'a2', key='a')
+    assert events == [('apply', 'a1'), ('apply', 'b1')]
+    timer.fire()
+    assert ('apply', 'a2') in events and ('settle', 'b1') in events
+
+
+def test_flush_runs_pending_and_settle_now():
+    throttle, timer = make_throttle()
+    events = []
+    submit(throttle, events, 1)
+    submit(throttle, events, 2)
+    throttle.flush()
+    assert events == [('apply', 1), ('apply', 2), ('settle', 2)]
+    assert not timer.sources
+
+
+def test_failing_apply_does_not_stop_the_burst():
+    throttle, timer = make_throttle()
+    events = []
+
+    def fail():
+        raise RuntimeError("compositor gone")
+
+    throttle.submit(KEY, 100, apply=fail, settle=lambda: events.append('settle'))
+    timer.fire()
+    assert events == ['settle']
@@ -0,0 +1,55 @@
+from wayfire_bridge.startup_cache import StartupCache, startup_fingerprint
+
+LOCALE1 = {
+    'Locale': ['LANG=de_DE.UTF-8', 'LC_TIME=en_GB.UTF-8'],
+    'X11Layout': 'de',
+    'X11Variant': '',
+    'X11Options': '',
+}
+
+# startbudgiewayfire and the systemd user service see different environments
+LOGIN_SHELL = {'LANG': 'C.UTF-8', 'HOME': '/home/user'}
+USER_SERVICE = {'LANG': 'de_DE.UTF-8', 'LC_ALL': 'C', 'HOME': '/home/user'}
+
+
+def test_environment_ignored_when_locale1_has_a_locale():
+    assert (startup_fingerprint('dconf', LOCALE1, 1, LOGIN_SHELL)
+            == startup_fingerprint('dconf', LOCALE1, 1, USER_SERVICE))
+
+
+def test_environment_counts_without_locale1_locale():
+    no_locale = dict(LOCALE1, Locale=[])
+    assert (startup_fingerprint('dconf', no_locale, 1, LOGIN_SHELL)
+            != startup_fingerprint('dconf', no_locale, 1, USER_SERVICE))
+    assert (startup_fingerprint('dconf', None, 1, LOGIN_SHELL)
+            != startup_fingerprint('dconf', None, 1, USER_SERVICE))
+
+
+def test_other_environment_variables_do_not_count():
+    assert (startup_fingerprint('dconf', None, 1, LOGIN_SHELL)
+            == startup_fingerprint('dconf', None, 1, dict(LOGIN_SHELL, HOME='/root')))
+
+
+def test_inputs_change_the_fingerprint():
+    base = startup_fingerprint('dconf', LOCALE1, 1, LOGIN_SHELL)
+    assert startup_fingerprint('dconf2', LOCALE1, 1, LOGIN_SHELL) != base
+    assert startup_fingerprint('dconf', dict(LOCALE1, X11Layout='us'), 1, LOGIN_SHELL) != base
+    assert startup_fingerprint('dconf', LOCALE1, 2, LOGIN_SHELL) != base
+
+
+def test_cache_is_fresh_until_an_output_changes(tmp_path):
+    ini = tmp_path / 'wayfire.ini'
+    ini.write_text('[core]\n')
+    outputs = {'wayfire.ini': ini}
+    cache = StartupCache(tmp_path)
+    inputs = startup_fingerprint('dconf', LOCALE1, 1, LOGIN_SHELL)
+
+    assert not cache.is_fresh(inputs, outputs)
+    cache.store(inputs, outputs, [('core', 'plugins')])
+    assert StartupCache(tmp_path).is_fresh(
+        startup_fingerprint('dconf', LOCALE1, 1, USER_SERVICE), outputs
+    )
+    assert cache.managed_options() == [('core', 'plugins')]
+
+    ini.write_text('[core]\nxwayland = true\n')
+    assert not cache.is_fresh(inputs, outputs)